@@ -1,61 +1,61 @@
 import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import json
-import shutil
-from github import Github
 from datetime import datetime
 
+# Share the sync/backup engine with the app in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from utils.backup_store import BackupStore
+from utils.job_runner import JobRunner
+from utils.storage_backend import DirectoryBackend, backend_state_path
+from utils.copy_engine import get_copy_engine
+from utils.save_catalog import get_catalog
+from utils.slot_replace import SlotReplacer
+from utils.backup_retention import prune_backups
+from utils.diagnostics import trace_run, span
+from utils.save_compare import summarize_changes, describe_changes
+from config.config_manager import ConfigManager, show_error_dialog
+
+# First entry of the user folder list; syncs every folder in one pass
+ALL_USER_FOLDERS = "All user folders"
+
 class ScheduleISyncApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Schedule I Save Sync")
         self.root.geometry("800x600")
         
-        # Default save directory path
-        self.default_save_dir = os.path.join(os.environ['USERPROFILE'], 
-                                            "AppData", "LocalLow", "TVGS", "Schedule I", "Saves")
-        
-        # Config file path
-        self.config_dir = os.path.join(os.environ['APPDATA'], "ScheduleISync")
-        self.config_file = os.path.join(self.config_dir, "config.json")
+        # Worker threads for copies so the window stays responsive
+        self.job_runner = JobRunner(self.root)
         
         # Load or create config
         self.load_config()
         
+        # Index of save and friend folders for the pickers
+        self.catalog = get_catalog(self.config_dir)
+        
+        # Installs downloaded saves by renaming, keeping the replaced slot
+        self.slot_replacer = SlotReplacer(self.config_dir)
+        
         # Create UI
         self.create_ui()
     
     def load_config(self):
-        """Load configuration or create default if not exists"""
-        self.config = {
-            "save_dir": self.default_save_dir,
-            "github_token": "",
-            "github_repo": "",
-            "friends": [],
-            "shared_folder": ""
-        }
-        
-        # Create config directory if it doesn't exist
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
-        
-        # Load existing config if available
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                    self.config.update(loaded_config)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load config: {str(e)}")
+        """Load the config shared with the main app and add our own settings"""
+        # ConfigManager writes only the keys we change, under a lock shared
+        # with the main app and the CLI, and takes over keys they change
+        self.config_manager = ConfigManager(
+            report_error=lambda message: self.job_runner.run_on_ui(show_error_dialog, message))
+        self.config_dir = self.config_manager.config_dir
+        self.config_file = self.config_manager.config_file
+        self.config = self.config_manager.config
+        self.config.setdefault("shared_folder", "")
+        self.config.setdefault("shared_folder_hash_check", False)
     
     def save_config(self):
         """Save configuration to file"""
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save config: {str(e)}")
+        self.config_manager.save_config()
     
     def create_ui(self):
         """Create the main user interface"""
@@ -130,6 +130,11 @@ class ScheduleISyncApp:
         self.download_btn = ttk.Button(action_frame, text="Download Friend's Save", 
                                       command=self.download_friend_save)
         self.download_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.undo_replace_btn = ttk.Button(action_frame, text="Undo Last Replace", 
+                                          command=self.undo_last_replace)
+        self.undo_replace_btn.pack(side=tk.LEFT, padx=5)
+        self._update_undo_button()
     
     def setup_settings_tab(self):
         """Setup the Settings tab"""
@@ -217,16 +222,14 @@ class ScheduleISyncApp:
         
         try:
             # Find user ID folders in the save directory
-            user_folders = []
-            for item in os.listdir(self.config["save_dir"]):
-                if os.path.isdir(os.path.join(self.config["save_dir"], item)):
-                    user_folders.append(item)
+            self.catalog.refresh(self.config["save_dir"])
+            user_folders = self.catalog.children(self.config["save_dir"])
             
             if not user_folders:
                 messagebox.showerror("Error", "No user save folders found")
                 return
             
-            # If multiple user folders, ask which one to sync
+            # If multiple user folders, ask which one to sync (or all of them)
             selected_user_folder = user_folders[0]  # Default to first one
             if len(user_folders) > 1:
                 user_select = tk.Toplevel(self.root)
@@ -241,6 +244,7 @@ class ScheduleISyncApp:
                 user_listbox = tk.Listbox(user_select, width=50, height=10)
                 user_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
                 
+                user_listbox.insert(tk.END, ALL_USER_FOLDERS)
                 for folder in user_folders:
                     user_listbox.insert(tk.END, folder)
                 
@@ -272,69 +276,144 @@ class ScheduleISyncApp:
                 if not selection_made[0]:
                     return  # User canceled
             
-            # Create a folder for this user in the shared folder
-            user_shared_dir = os.path.join(self.config["shared_folder"], "MySaves")
-            if not os.path.exists(user_shared_dir):
-                os.makedirs(user_shared_dir)
-            
-            # Create a subfolder for this user ID
-            user_id_shared_dir = os.path.join(user_shared_dir, selected_user_folder)
-            if not os.path.exists(user_id_shared_dir):
-                os.makedirs(user_id_shared_dir)
-            
-            # Copy all save games from the user folder to the shared folder
-            source_user_dir = os.path.join(self.config["save_dir"], selected_user_folder)
-            
-            # Clear existing files in the shared folder
-            for item in os.listdir(user_id_shared_dir):
-                item_path = os.path.join(user_id_shared_dir, item)
-                if os.path.isfile(item_path):
-                    os.unlink(item_path)
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-            
-            # Copy all save games
-            for item in os.listdir(source_user_dir):
-                s = os.path.join(source_user_dir, item)
-                d = os.path.join(user_id_shared_dir, item)
-                if os.path.isfile(s):
-                    shutil.copy2(s, d)
-                elif os.path.isdir(s):
-                    shutil.copytree(s, d)
-            
-            # Create a metadata file with timestamp
-            with open(os.path.join(user_id_shared_dir, "sync_info.txt"), "w") as f:
-                f.write(f"Last synced: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"User: {selected_user_folder}\n")
-            
-            # Update last sync time
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.last_sync_label.config(text=current_time)
-            
-            messagebox.showinfo("Success", f"Save files for user {selected_user_folder} successfully synced to shared folder!")
+            selected = user_folders if selected_user_folder == ALL_USER_FOLDERS else [selected_user_folder]
+            self.sync_btn.config(state=tk.DISABLED)
+            self.last_sync_label.config(text="Syncing...")
+            self.job_runner.submit("Sync to shared folder", self._sync_user_folders, selected,
+                                   on_done=self._on_shared_sync_done,
+                                   on_error=self._on_shared_sync_error)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to sync to shared folder: {str(e)}")
             import traceback
             traceback.print_exc()
     
+    def _sync_user_folders(self, user_folders):
+        """Copy user folders to the shared folder in one pass (runs on a worker thread)"""
+        # Each user gets a subfolder of MySaves in the shared folder
+        user_shared_dir = os.path.join(self.config["shared_folder"], "MySaves")
+        if not os.path.exists(user_shared_dir):
+            os.makedirs(user_shared_dir)
+        
+        # Scan all selected folders once, copy only new or changed files (in
+        # parallel, across users) and remove deleted ones. Copies are staged
+        # so the shared folder is never left half-empty, and other users'
+        # folders in MySaves are not touched. Each selection of folders has
+        # its own manifest, so syncing one user never looks like the other
+        # users' files were deleted.
+        selection = user_shared_dir + "|" + ",".join(sorted(user_folders))
+        backend = DirectoryBackend(
+            user_shared_dir,
+            backend_state_path(self.config_dir, "manifests", selection) + ".json",
+            use_hash=self.config.get("shared_folder_hash_check", False),
+            keep=tuple(f"{folder}/sync_info.txt" for folder in user_folders),
+            volatile_keys=self.config["volatile_json_keys"],
+            folders=user_folders)
+        with trace_run("shared_sync", self.config_dir):
+            result = backend.sync(self.config["save_dir"], user_folders)
+        
+        # Create a metadata file with timestamp for each user
+        for folder in user_folders:
+            os.makedirs(os.path.join(user_shared_dir, folder), exist_ok=True)
+            with open(os.path.join(user_shared_dir, folder, "sync_info.txt"), "w") as f:
+                f.write(f"Last synced: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"User: {folder}\n")
+        
+        changes = describe_changes(summarize_changes(result["changed"], result["removed"], result["ignored"]))
+        return ", ".join(user_folders), changes
+    
+    def _on_shared_sync_done(self, result):
+        selected_user_folder, changes = result
+        # Update last sync time
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.last_sync_label.config(text=current_time)
+        self.sync_btn.config(state=tk.NORMAL)
+        
+        messagebox.showinfo("Success", f"Save files for user {selected_user_folder} successfully synced to shared folder!\n\n{changes}")
+    
+    def _on_shared_sync_error(self, error):
+        self.last_sync_label.config(text="Sync failed")
+        self.sync_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Failed to sync to shared folder: {str(error)}")
+    
     def create_backup(self):
         """Create a local backup of save files"""
         if not os.path.exists(self.config["save_dir"]):
             messagebox.showerror("Error", f"Save directory not found: {self.config['save_dir']}")
             return
         
-        backup_dir = os.path.join(self.config_dir, "backups", 
-                                 f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.backup_btn.config(state=tk.DISABLED)
+        self.job_runner.submit("Backup", self._backup_saves,
+                               on_done=self._on_backup_done, on_error=self._on_backup_error)
+    
+    def _backup_saves(self):
+        """Write a backup of the save directory (runs on a worker thread)"""
+        backup_store = BackupStore(os.path.join(self.config_dir, "backups"),
+                                   volatile_keys=self.config["volatile_json_keys"])
+        with trace_run("backup", self.config_dir):
+            backup_path = backup_store.create_backup(self.config["save_dir"])
+            try:
+                # Thin out old backups while we are still on the worker thread
+                with span("prune"):
+                    prune_backups(backup_store, self.catalog, self.config["backup_budget_mb"])
+            except Exception as e:
+                print(f"Warning: Could not prune old backups: {e}")
+        return backup_path
+    
+    def _on_backup_done(self, backup_path):
+        self.backup_btn.config(state=tk.NORMAL)
+        messagebox.showinfo("Backup", f"Backup created successfully at:\n{backup_path}")
+    
+    def _on_backup_error(self, error):
+        self.backup_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Failed to create backup: {str(error)}")
+    
+    def _install_save(self, source_path, target_path, backup_first):
+        """Copy a friend's save into a local slot (runs on a worker thread)"""
+        with trace_run("install", self.config_dir):
+            if backup_first:
+                self._backup_saves()
+            # Copy the downloaded save next to the slot, then swap it in; the
+            # slot it replaces is kept so the replace can be undone
+            self.slot_replacer.install(
+                target_path,
+                lambda staging_dir: get_copy_engine().copy_tree(source_path, staging_dir).raise_errors())
+        return target_path
+    
+    def _on_install_done(self, message):
+        self._update_undo_button()
+        messagebox.showinfo("Success", message)
+    
+    def _update_undo_button(self):
+        state = tk.NORMAL if self.slot_replacer.last_replace() else tk.DISABLED
+        self.undo_replace_btn.config(state=state)
+    
+    def undo_last_replace(self):
+        """Swap the last downloaded save with the slot it replaced"""
+        last = self.slot_replacer.last_replace()
+        if not last:
+            self._update_undo_button()
+            return
+        
+        slot_name = os.path.basename(last["target"])
+        if last["undone"]:
+            question = f"Put the save downloaded into {slot_name} on {last['time']} back?"
+        elif last["replaced"]:
+            question = f"Restore {slot_name} to how it was before the download on {last['time']}?"
+        else:
+            question = f"Remove {slot_name}, which was created by the download on {last['time']}?"
+        if not messagebox.askyesno("Undo Last Replace", question):
+            return
         
         try:
-            if not os.path.exists(os.path.dirname(backup_dir)):
-                os.makedirs(os.path.dirname(backup_dir))
-            
-            shutil.copytree(self.config["save_dir"], backup_dir)
-            messagebox.showinfo("Backup", f"Backup created successfully at:\n{backup_dir}")
+            last = self.slot_replacer.undo_last()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to create backup: {str(e)}")
+            messagebox.showerror("Error", f"Failed to undo: {str(e)}\n\nMake sure the game is closed.")
+            return
+        if last["undone"]:
+            messagebox.showinfo("Undo Last Replace", f"{slot_name} has been undone. Click again to redo.")
+        else:
+            messagebox.showinfo("Undo Last Replace", f"The downloaded save is back in {slot_name}.")
     
     def download_friend_save(self):
         """Download a friend's save from the shared folder"""
@@ -349,9 +428,9 @@ class ScheduleISyncApp:
             friend_folders = []
             
             # Check all subfolders in the shared folder
-            for item in os.listdir(shared_folder):
-                item_path = os.path.join(shared_folder, item)
-                if os.path.isdir(item_path) and item != "MySaves":  # Skip our own saves
+            self.catalog.refresh(shared_folder, "friend")
+            for item in self.catalog.children(shared_folder):
+                if item != "MySaves":  # Skip our own saves
                     friend_folders.append(item)
             
             if not friend_folders:
@@ -410,10 +489,7 @@ class ScheduleISyncApp:
             friend_dir = os.path.join(shared_folder, friend_name)
             
             # Check for user ID folders in the friend's directory
-            user_folders = []
-            for item in os.listdir(friend_dir):
-                if os.path.isdir(os.path.join(friend_dir, item)):
-                    user_folders.append(item)
+            user_folders = self.catalog.children(friend_dir)
             
             if not user_folders:
                 messagebox.showerror("Error", f"No user save folders found for {friend_name}")
@@ -471,10 +547,7 @@ class ScheduleISyncApp:
             
             # Now check for save games within the selected user folder
             source_user_dir = os.path.join(friend_dir, selected_user_folder)
-            save_games = []
-            for item in os.listdir(source_user_dir):
-                if os.path.isdir(os.path.join(source_user_dir, item)):
-                    save_games.append(item)
+            save_games = self.catalog.children(source_user_dir)
             
             if not save_games:
                 messagebox.showerror("Error", f"No save games found in user folder {selected_user_folder}")
@@ -510,8 +583,7 @@ class ScheduleISyncApp:
                 source_path = os.path.join(source_user_dir, selected_save)
                 
                 # Ask user if they want to backup their current save
-                if messagebox.askyesno("Backup", "Do you want to backup your current save before downloading?"):
-                    self.create_backup()
+                backup_first = messagebox.askyesno("Backup", "Do you want to backup your current save before downloading?")
                 
                 # Check if the user folder exists in the local save directory
                 local_user_dir = os.path.join(self.config["save_dir"], selected_user_folder)
@@ -526,10 +598,8 @@ class ScheduleISyncApp:
                 
                 if choice == 'yes':
                     # Get list of existing saves
-                    existing_saves = []
-                    for item in os.listdir(local_user_dir):
-                        if os.path.isdir(os.path.join(local_user_dir, item)):
-                            existing_saves.append(item)
+                    self.catalog.refresh(self.config["save_dir"])
+                    existing_saves = self.catalog.children(local_user_dir)
                     
                     if not existing_saves:
                         messagebox.showinfo("Info", "No existing saves found. Creating a new save slot.")
@@ -581,26 +651,23 @@ class ScheduleISyncApp:
                         if replace_selection[0] is None:
                             return  # User canceled
                         
-                        # Replace the selected save
-                        try:
-                            replace_path = os.path.join(local_user_dir, replace_selection[0])
-                            # Remove existing save
-                            shutil.rmtree(replace_path)
-                            # Copy the downloaded save with the same name
-                            shutil.copytree(source_path, replace_path)
-                            
-                            messagebox.showinfo("Success", 
-                                               f"Successfully replaced save {replace_selection[0]} with {friend_name}'s save: {selected_save}")
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Failed to replace save: {str(e)}")
+                        # Replace the selected save in the background
+                        replace_path = os.path.join(local_user_dir, replace_selection[0])
+                        replaced_save = replace_selection[0]
+                        self.job_runner.submit(
+                            "Replace save", self._install_save, source_path, replace_path, backup_first,
+                            on_done=lambda path: self._on_install_done(
+                                f"Successfully replaced save {replaced_save} with {friend_name}'s save: {selected_save}"),
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to replace save: {str(e)}"))
                 
                 if choice == 'no':
                     # Create a new save slot
                     try:
                         # Find the next available save slot number
                         save_numbers = []
-                        for item in os.listdir(local_user_dir):
-                            if item.startswith("SaveGame_") and os.path.isdir(os.path.join(local_user_dir, item)):
+                        self.catalog.refresh(self.config["save_dir"])
+                        for item in self.catalog.children(local_user_dir):
+                            if item.startswith("SaveGame_"):
                                 try:
                                     num = int(item.split("_")[1])
                                     save_numbers.append(num)
@@ -614,11 +681,12 @@ class ScheduleISyncApp:
                         new_save_name = f"SaveGame_{next_num}"
                         new_save_path = os.path.join(local_user_dir, new_save_name)
                         
-                        # Copy the downloaded save to the new slot
-                        shutil.copytree(source_path, new_save_path)
-                        
-                        messagebox.showinfo("Success", 
-                                           f"Successfully downloaded {friend_name}'s save as a new save slot: {new_save_name}")
+                        # Copy the downloaded save to the new slot in the background
+                        self.job_runner.submit(
+                            "Download save", self._install_save, source_path, new_save_path, backup_first,
+                            on_done=lambda path: self._on_install_done(
+                                f"Successfully downloaded {friend_name}'s save as a new save slot: {new_save_name}"),
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to create new save slot: {str(e)}"))
                     except Exception as e:
                         messagebox.showerror("Error", f"Failed to create new save slot: {str(e)}")
                 
@@ -0,0 +1,63 @@
+"""Helpers shared by the benchmark scripts.
+
+Every script prints one JSON document:
+
+    {"benchmark": ..., "environment": {...}, "params": {...},
+     "results": [{"name": ..., "wall_s": {"median": ..., ...}, ...}]}
+
+so compare.py can line up any two runs of the same benchmark.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_DIR, "src")
+
+
+def summarise(samples):
+    """Return median/min/max of a list of timings in seconds"""
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "samples": samples
+    }
+
+
+def environment_info():
+    """Describe the machine and code version a run was made with"""
+    info = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+    for key, args in (("commit", ["git", "-C", REPO_DIR, "rev-parse", "HEAD"]),
+                      ("git", ["git", "--version"])):
+        try:
+            info[key] = subprocess.run(args, capture_output=True, text=True,
+                                       check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            info[key] = None
+    return info
+
+
+def write_results(benchmark, params, results, output=None):
+    """Print (or save to output) the JSON document for a benchmark run"""
+    document = {
+        "benchmark": benchmark,
+        "environment": environment_info(),
+        "params": params,
+        "results": results
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
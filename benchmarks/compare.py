@@ -0,0 +1,69 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python benchmarks/compare.py baseline.json current.json --threshold 1.2
+
+Prints one line per scenario with the median wall time, bytes written and
+peak memory of both runs. Exits with status 1 if any median got slower by
+more than the threshold factor.
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path) as f:
+        document = json.load(f)
+    return document, {result["name"]: result for result in document["results"]}
+
+
+def ratio(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return new / old
+
+
+def format_ratio(value):
+    return "    -" if value is None else f"{value:5.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slow-down factor that counts as a regression")
+    args = parser.parse_args()
+
+    old_doc, old = load(args.baseline)
+    new_doc, new = load(args.current)
+    if old_doc["benchmark"] != new_doc["benchmark"]:
+        sys.exit(f"Cannot compare a {old_doc['benchmark']} run with a {new_doc['benchmark']} run")
+    if old_doc.get("params") != new_doc.get("params"):
+        print("Warning: the runs used different parameters", file=sys.stderr)
+
+    regressions = []
+    print(f"{'scenario':<26} {'old s':>9} {'new s':>9} {'time':>7} {'bytes':>7} {'memory':>7}")
+    for name, result in new.items():
+        if "wall_s" not in result:
+            print(f"{name:<26} (skipped)")
+            continue
+        if name not in old or "wall_s" not in old[name]:
+            print(f"{name:<26} (no baseline)")
+            continue
+        before, after = old[name], result
+        wall = ratio(before["wall_s"]["median"], after["wall_s"]["median"])
+        print(f"{name:<26} {before['wall_s']['median']:9.3f} {after['wall_s']['median']:9.3f} "
+              f"{format_ratio(wall):>7} "
+              f"{format_ratio(ratio(before.get('bytes_written'), after.get('bytes_written'))):>7} "
+              f"{format_ratio(ratio(before.get('peak_python_bytes'), after.get('peak_python_bytes'))):>7}")
+        if wall is not None and wall > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"Slower than {args.threshold}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
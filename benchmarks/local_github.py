@@ -0,0 +1,116 @@
+"""A local stand-in for the GitHub REST API, backed by bare git repos.
+
+Serves the handful of endpoints the app uses (user, repos, git trees,
+blobs and commits) from bare repositories on disk. Repo lookups return the
+bare repo's path as clone_url, so GitHubManager pushes to it directly.
+Point the "github_api_url" setting at LocalGitHub.url to use it.
+"""
+import re
+import json
+import hashlib
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class LocalGitHub:
+    def __init__(self, login="benchmark"):
+        self.login = login
+        self.repos = {}
+        self.request_count = 0
+        self._server = None
+
+    def add_repo(self, full_name, git_dir):
+        """Serve the bare repository at git_dir as full_name"""
+        self.repos[full_name] = git_dir
+
+    def start(self):
+        handler = type("Handler", (_Handler,), {"github": self})
+        self._server = _Server(("127.0.0.1", 0), handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def git(self, full_name, *args):
+        return subprocess.run(["git", "--git-dir", self.repos[full_name], *args],
+                              capture_output=True, check=True).stdout
+
+
+class _Server(ThreadingHTTPServer):
+    # The downloader fetches blobs on many threads at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    github = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.github.request_count += 1
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/user":
+            return self._send_json({"login": self.github.login})
+
+        match = re.match(r"^/repos/([^/]+/[^/]+)(/.*)?$", url.path)
+        if not match or match.group(1) not in self.github.repos:
+            return self._send_json({"message": "Not Found"}, 404)
+        repo, rest = match.group(1), match.group(2) or ""
+        try:
+            if not rest:
+                return self._send_json({
+                    "full_name": repo,
+                    "clone_url": self.github.repos[repo],
+                    "default_branch": "master"
+                })
+            if rest.startswith("/git/trees/"):
+                return self._send_tree(repo, rest[len("/git/trees/"):], "recursive" in query)
+            if rest.startswith("/contents/"):
+                data = self.github.git(repo, "show", "master:" + rest[len("/contents/"):])
+                return self._send(data, "application/octet-stream")
+            if rest.startswith("/git/blobs/"):
+                data = self.github.git(repo, "cat-file", "blob", rest[len("/git/blobs/"):])
+                return self._send(data, "application/octet-stream")
+            if rest == "/commits":
+                sha = self.github.git(repo, "rev-parse", "master").decode().strip()
+                etag = '"%s"' % hashlib.sha1(sha.encode()).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(b"", status=304, etag=etag)
+                return self._send_json([{"sha": sha}], etag=etag)
+        except subprocess.CalledProcessError:
+            pass
+        return self._send_json({"message": "Not Found"}, 404)
+
+    def _send_tree(self, repo, ref, recursive):
+        args = ["ls-tree"] + (["-r", "-t"] if recursive else []) + [ref]
+        tree = []
+        for line in self.github.git(repo, *args).decode().splitlines():
+            meta, path = line.split("\t", 1)
+            mode, kind, sha = meta.split()
+            tree.append({"path": path, "mode": mode, "type": kind, "sha": sha})
+        self._send_json({"sha": ref, "tree": tree, "truncated": False})
+
+    def _send_json(self, data, status=200, etag=None):
+        self._send(json.dumps(data).encode("utf-8"), "application/json", status, etag)
+
+    def _send(self, body, content_type="application/json", status=200, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
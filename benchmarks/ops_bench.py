@@ -0,0 +1,291 @@
+"""Benchmarks for sync, backup, shared-folder sync and download/replace.
+
+Builds a generated save tree (see save_tree.py) and times each operation in
+a fresh workspace: a temporary config folder, a local bare git remote served
+through a local stand-in for the GitHub API, and a temporary shared folder.
+Nothing touches the real saves, config or GitHub.
+
+For every scenario it records wall time (over --runs runs), the bytes and
+files written to the folders the operation writes to, and the peak Python
+heap seen by tracemalloc (measured in one extra run, so tracing does not
+skew the timings; memory used by git child processes is not included).
+
+    python benchmarks/ops_bench.py --users 2 --slots 5 --files 40 > ops.json
+    python benchmarks/compare.py old.json ops.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+from common import SRC_DIR, summarise, write_results
+from save_tree import generate_save_tree, mutate_save_tree, touch_save_tree, tree_size
+from local_github import LocalGitHub
+
+sys.path.insert(0, SRC_DIR)
+
+from config.config_manager import ConfigManager
+from utils.github_manager import GitHubManager
+from utils.save_manager import SaveManager
+from utils.storage_backend import DirectoryBackend, LocalGitBackend, backend_state_path
+from utils.copy_engine import get_copy_engine
+from utils.github_api import get_github_api
+from utils.friend_downloader import FriendDownloader
+from utils.slot_replace import SlotReplacer
+
+
+class Workspace:
+    """A throw-away home for one scenario run"""
+
+    def __init__(self, base, template, github, upload_format, index):
+        self.root = os.path.join(base, f"run_{index}")
+        self.save_dir = os.path.join(self.root, "saves")
+        self.shared_dir = os.path.join(self.root, "shared")
+        self.remote_dir = os.path.join(self.root, "remote.git")
+        self.repo_name = f"benchmark/saves-{index}"
+        get_copy_engine().copy_tree(template, self.save_dir).raise_errors()
+        subprocess.run(["git", "init", "-q", "--bare", self.remote_dir], check=True)
+        github.add_repo(self.repo_name, self.remote_dir)
+
+        # ConfigManager finds its folders through these variables
+        os.environ["USERPROFILE"] = os.path.join(self.root, "home")
+        os.environ["APPDATA"] = os.path.join(self.root, "appdata")
+        self.config_manager = ConfigManager()
+        self.config_manager.config.update({
+            "save_dir": self.save_dir,
+            "github_token": "benchmark",
+            "github_repo": self.repo_name,
+            "github_api_url": github.url,
+            "upload_format": upload_format
+        })
+        self.config_dir = self.config_manager.config_dir
+        self.users = sorted(os.listdir(self.save_dir))
+
+    def sync(self):
+        return GitHubManager(self.config_manager).sync_saves()
+
+    def backup(self):
+        return os.path.basename(SaveManager(self.config_manager).create_backup())
+
+    def local_git_sync(self):
+        """Sync straight to a bare repo on disk, without the GitHub API"""
+        backend = LocalGitBackend(
+            os.path.join(self.root, "local.git"),
+            os.path.join(self.config_dir, "local_mirror"),
+            os.path.join(self.config_dir, "local_manifest.json"),
+            packed=self.config_manager.config["upload_format"] == "packed")
+        return self._totals([backend.sync(self.save_dir, self.users)])
+
+    def shared_sync(self):
+        """Copy every user folder to the shared folder in one pass, as S1SGSM does"""
+        dest_dir = os.path.join(self.shared_dir, "MySaves")
+        backend = DirectoryBackend(
+            dest_dir,
+            backend_state_path(self.config_dir, "manifests", dest_dir + "|" + ",".join(sorted(self.users))) + ".json",
+            keep=tuple(f"{user}/sync_info.txt" for user in self.users),
+            volatile_keys=self.config_manager.config["volatile_json_keys"], folders=self.users)
+        return self._totals([backend.sync(self.save_dir, self.users)])
+
+    def _totals(self, results):
+        return {
+            "changed": sum(len(result["changed"]) for result in results),
+            "removed": sum(len(result["removed"]) for result in results),
+            "ignored": sum(len(result["ignored"]) for result in results),
+            "bytes": sum(result["bytes"] for result in results)
+        }
+
+    def downloader(self):
+        config = self.config_manager.config
+        api = get_github_api(config["github_token"], config["github_api_url"])
+        return FriendDownloader(api, os.path.join(self.config_dir, "blob_cache"))
+
+    def download(self, slot, target):
+        """Download one slot of our own remote into target, as the Friends tab does"""
+        downloader = self.downloader()
+        slot_ref = downloader.list_slots(self.repo_name)[slot]
+        return SaveManager(self.config_manager).install_save(
+            target, lambda staging_dir: downloader.download_slot(self.repo_name, slot_ref, staging_dir))
+
+    def install_shared(self, source, target):
+        """Replace a slot with a copy from the shared folder, as S1SGSM does"""
+        return SlotReplacer(self.config_dir).install(
+            target, lambda staging_dir: get_copy_engine().copy_tree(source, staging_dir).bytes)
+
+    def undo_replace(self):
+        return SaveManager(self.config_manager).undo_last_replace()["undone"]
+
+
+def scenarios(mutate_fraction):
+    """Return (name, setup, run, written folders) for every scenario"""
+    def mutate(ws):
+        mutate_save_tree(ws.save_dir, mutate_fraction)
+
+    def touch(ws):
+        touch_save_tree(ws.save_dir, mutate_fraction)
+
+    def first_slot(ws):
+        return f"{ws.users[0]}/SaveGame_1"
+
+    def new_slot_dir(ws):
+        return os.path.join(ws.save_dir, ws.users[0], "SaveGame_Downloaded")
+
+    def sync_dirs(ws):
+        return [ws.config_dir, ws.remote_dir]
+
+    def then(*steps):
+        def run_all(ws):
+            for step in steps:
+                step(ws)
+        return run_all
+
+    def download_then_change(ws):
+        ws.sync()
+        ws.download(first_slot(ws), new_slot_dir(ws))
+        mutate(ws)
+        ws.sync()
+
+    def install_first_slot(ws):
+        return ws.install_shared(os.path.join(ws.shared_dir, "MySaves", ws.users[-1], "SaveGame_1"),
+                          os.path.join(ws.save_dir, ws.users[0], "SaveGame_1"))
+
+    return [
+        ("sync_initial", None, Workspace.sync, sync_dirs),
+        ("sync_unchanged", Workspace.sync, Workspace.sync, sync_dirs),
+        ("sync_incremental", then(Workspace.sync, mutate), Workspace.sync, sync_dirs),
+        ("sync_timestamp_only", then(Workspace.sync, touch), Workspace.sync, sync_dirs),
+        ("local_git_initial", None, Workspace.local_git_sync,
+         lambda ws: [ws.config_dir, os.path.join(ws.root, "local.git")]),
+        ("local_git_incremental", then(Workspace.local_git_sync, mutate), Workspace.local_git_sync,
+         lambda ws: [ws.config_dir, os.path.join(ws.root, "local.git")]),
+        ("backup_initial", None, Workspace.backup,
+         lambda ws: [os.path.join(ws.config_dir, "backups")]),
+        ("backup_incremental", then(Workspace.backup, mutate), Workspace.backup,
+         lambda ws: [os.path.join(ws.config_dir, "backups")]),
+        ("backup_timestamp_only", then(Workspace.backup, touch), Workspace.backup,
+         lambda ws: [os.path.join(ws.config_dir, "backups")]),
+        ("shared_sync_initial", None, Workspace.shared_sync,
+         lambda ws: [ws.shared_dir]),
+        ("shared_sync_incremental", then(Workspace.shared_sync, mutate), Workspace.shared_sync,
+         lambda ws: [ws.shared_dir]),
+        ("shared_sync_timestamp_only", then(Workspace.shared_sync, touch), Workspace.shared_sync,
+         lambda ws: [ws.shared_dir]),
+        ("download_new_slot", Workspace.sync,
+         lambda ws: ws.download(first_slot(ws), new_slot_dir(ws)),
+         lambda ws: [new_slot_dir(ws), os.path.join(ws.config_dir, "blob_cache")]),
+        ("download_replace_slot", download_then_change,
+         lambda ws: ws.download(first_slot(ws), new_slot_dir(ws)),
+         lambda ws: [new_slot_dir(ws), os.path.join(ws.config_dir, "blob_cache")]),
+        ("shared_install_replace", Workspace.shared_sync, install_first_slot,
+         lambda ws: [os.path.join(ws.save_dir, ws.users[0], "SaveGame_1")]),
+        ("undo_replace", then(Workspace.shared_sync, install_first_slot), Workspace.undo_replace,
+         lambda ws: [os.path.join(ws.save_dir, ws.users[0])]),
+    ]
+
+
+def snapshot(folders):
+    """Return {path: (size, mtime_ns, inode)} for every file under folders"""
+    files = {}
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+    return files
+
+
+def measure(ws, run, written_dirs, trace=False):
+    folders = written_dirs(ws)
+    before = snapshot(folders)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = run(ws)
+    wall = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    after = snapshot(folders)
+    written = [stat for path, stat in after.items() if before.get(path) != stat]
+    return {
+        "wall": wall,
+        "result": result,
+        "files_written": len(written),
+        "bytes_written": sum(stat[0] for stat in written),
+        "peak_python_bytes": peak
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2, help="Steam user folders")
+    parser.add_argument("--slots", type=int, default=5, help="SaveGame_* slots per user")
+    parser.add_argument("--files", type=int, default=40, help="JSON files per slot")
+    parser.add_argument("--file-size", type=int, default=4096, help="approximate bytes per file")
+    parser.add_argument("--mutate", type=float, default=0.05,
+                        help="fraction of files changed for the incremental scenarios")
+    parser.add_argument("--upload-format", choices=["raw", "packed"], default="raw")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--only", help="comma separated scenario names to run")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary workspaces")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="s1sync-bench-")
+    github = LocalGitHub().start()
+    try:
+        template = os.path.join(base, "template")
+        generate_save_tree(template, args.users, args.slots, args.files, args.file_size)
+        file_count, total_bytes = tree_size(template)
+        params = dict(vars(args), tree_files=file_count, tree_bytes=total_bytes)
+        for key in ("only", "keep", "output"):
+            params.pop(key)
+
+        only = set(args.only.split(",")) if args.only else None
+        results = []
+        index = 0
+        # The app prints progress notes; keep stdout for the JSON document
+        with contextlib.redirect_stdout(sys.stderr):
+            for name, setup, run, written_dirs in scenarios(args.mutate):
+                if only and name not in only:
+                    continue
+                samples = []
+                for attempt in range(args.runs + 1):
+                    ws = Workspace(base, template, github, args.upload_format, index)
+                    index += 1
+                    if setup:
+                        setup(ws)
+                    # The last run is traced for memory and left out of the timings
+                    sample = measure(ws, run, written_dirs, trace=attempt == args.runs)
+                    samples.append(sample)
+                    if not args.keep:
+                        shutil.rmtree(ws.root, ignore_errors=True)
+                timed, traced = samples[:-1], samples[-1]
+                results.append({
+                    "name": name,
+                    "wall_s": summarise([sample["wall"] for sample in timed]),
+                    "bytes_written": timed[-1]["bytes_written"],
+                    "files_written": timed[-1]["files_written"],
+                    "peak_python_bytes": traced["peak_python_bytes"],
+                    "result": json.loads(json.dumps(timed[-1]["result"], default=str))
+                })
+                print(f"{name}: {results[-1]['wall_s']['median']:.3f}s", file=sys.stderr)
+    finally:
+        github.stop()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    write_results("operations", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Generates Schedule I style save trees for the benchmarks.
+
+A tree is <root>/<steam user id>/SaveGame_<n>/... with a fixed set of JSON
+files per slot, spread over the sub-folders a real save uses. Contents are
+derived from a seed, so the same parameters always produce the same bytes.
+"""
+import os
+import json
+import random
+
+# Sub-folders of a real save slot that the generated files are spread over
+SLOT_FOLDERS = ["", "Players/Player_0", "Properties", "Businesses", "Vehicles", "NPCs"]
+
+# Fixed mtime for generated files, so re-generating a tree does not look
+# like a change to mtime based comparisons
+GENERATED_MTIME = 1700000000
+
+
+def user_ids(users):
+    return [str(76561198000000000 + i) for i in range(users)]
+
+
+def slot_files(files):
+    """Return the relative paths of the files in one generated slot"""
+    paths = ["Game.json", "Metadata.json", "Money.json"][:files]
+    for i in range(len(paths), files):
+        folder = SLOT_FOLDERS[i % len(SLOT_FOLDERS)]
+        paths.append(f"{folder}/Data_{i}.json".lstrip("/"))
+    return paths
+
+
+def json_blob(rng, size):
+    """Return roughly size bytes of indented, game-like JSON"""
+    data = {
+        "DataType": "GenericSaveData",
+        "DataVersion": 0,
+        "GameVersion": "0.3.3f15",
+        "LastPlayedDate": "2025-04-01T12:00:00",
+        "Items": []
+    }
+    text = json.dumps(data, indent=4)
+    while len(text) < size:
+        data["Items"].append({
+            "ID": f"item_{rng.randrange(1 << 30):08x}",
+            "Quantity": rng.randrange(1, 100),
+            "Quality": rng.choice(["Trash", "Poor", "Standard", "Premium", "Heavenly"]),
+            "Position": {axis: round(rng.uniform(-500, 500), 3) for axis in "xyz"}
+        })
+        text = json.dumps(data, indent=4)
+    return text.encode("utf-8")
+
+
+def generate_save_tree(root, users=2, slots=5, files=40, file_size=4096, seed=0):
+    """Write users x slots x files JSON files under root and return the file count"""
+    rng = random.Random(seed)
+    count = 0
+    for user in user_ids(users):
+        for slot in range(1, slots + 1):
+            slot_dir = os.path.join(root, user, f"SaveGame_{slot}")
+            for rel_path in slot_files(files):
+                path = os.path.join(slot_dir, *rel_path.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(json_blob(rng, file_size))
+                os.utime(path, (GENERATED_MTIME, GENERATED_MTIME))
+                count += 1
+    return count
+
+
+def mutate_save_tree(root, fraction=0.05, seed=1):
+    """Rewrite a fraction of the files in root, as a play session would.
+
+    Returns the relative paths that were changed.
+    """
+    rng = random.Random(seed)
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+    changed = rng.sample(paths, max(1, int(len(paths) * fraction))) if paths else []
+    for path in changed:
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+        data["LastPlayedDate"] = "2025-04-02T18:30:00"
+        data["Items"].append({"ID": f"item_{rng.randrange(1 << 30):08x}", "Quantity": 1})
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in changed]
+
+
+def touch_save_tree(root, fraction=0.05, seed=2):
+    """Re-save a fraction of the files with only LastPlayedDate changed,
+    as the game does when nothing happened. Returns the relative paths."""
+    rng = random.Random(seed)
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+    touched = rng.sample(paths, max(1, int(len(paths) * fraction))) if paths else []
+    for path in touched:
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+        data["LastPlayedDate"] = "2025-04-03T09:15:00"
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in touched]
+
+
+def tree_size(root):
+    """Return (file count, total bytes) of a folder"""
+    count = size = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            count += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return count, size
@@ -0,0 +1,81 @@
+"""Startup-time benchmark for the Schedule I Save Sync UI.
+
+Measures, in fresh interpreter processes, how long importing ui.app takes,
+how long it takes until the main window has been drawn for the first time
+and how long a headless "cli.py status" run takes.
+Results are printed as JSON so runs can be compared across versions:
+
+    python benchmarks/startup_bench.py --runs 10 > startup.json
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+from common import SRC_DIR, summarise, write_results
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import ui.app
+print(time.perf_counter() - start)
+"""
+
+WINDOW_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import tkinter as tk
+from ui.app import ScheduleISyncApp
+root = tk.Tk()
+app = ScheduleISyncApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.job_runner.shutdown()
+root.destroy()
+"""
+
+CLI_SCRIPT = """
+import io, sys, time, contextlib
+start = time.perf_counter()
+import cli
+with contextlib.redirect_stdout(io.StringIO()):
+    cli.main(["status"])
+print(time.perf_counter() - start)
+"""
+
+
+def run_script(script, config_home):
+    """Run script in a fresh interpreter and return the seconds it printed"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    # Keep the benchmark away from the real save folder and app config
+    env["USERPROFILE"] = config_home
+    env["APPDATA"] = config_home
+    output = subprocess.run([sys.executable, "-c", script], env=env, cwd=SRC_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config-home", default=None,
+                        help="folder used as USERPROFILE/APPDATA (default: a temp dir)")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    config_home = args.config_home or tempfile.mkdtemp(prefix="s1sync-bench-")
+    results = []
+    for name, script in (("import_ui_app", IMPORT_SCRIPT), ("first_window", WINDOW_SCRIPT),
+                         ("cli_status", CLI_SCRIPT)):
+        try:
+            samples = [run_script(script, config_home) for _ in range(args.runs)]
+            results.append({"name": name, "wall_s": summarise(samples)})
+        except subprocess.CalledProcessError as e:
+            # No display (e.g. a CI box); the other timings are still useful
+            results.append({"name": name, "skipped": e.stderr.strip().splitlines()[-1]})
+
+    write_results("startup", {"runs": args.runs}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
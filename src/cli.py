@@ -0,0 +1,257 @@
+"""Headless command line for Schedule I Save Sync.
+
+Runs the same sync, backup and download code as the app without loading
+tkinter, so it can run from cron, a systemd timer or Task Scheduler:
+
+    python -m cli sync                      (from the src folder)
+    python src/cli.py backup
+    python src/cli.py restore --slot 7656.../SaveGame_1 --at 2024-05-01T20:00
+    python src/cli.py download <friend or repo> 7656.../SaveGame_2 --into SaveGame_3
+    python src/cli.py status
+
+Every command prints one JSON object to stdout ({"ok": true, "command": ...}
+plus its result, or {"ok": false, "error": ...}); progress messages and
+warnings go to stderr. The exit code tells what happened (see EXIT_*).
+Engine modules are imported by the command that needs them to keep
+startup cheap.
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+# argparse exits with 2 on bad arguments
+EXIT_USAGE = 2
+EXIT_NOT_CONFIGURED = 3
+EXIT_NOT_FOUND = 4
+
+
+class CliError(Exception):
+    """A failure with a specific exit code"""
+
+    def __init__(self, message, exit_code=EXIT_FAILED):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def report_error(message):
+    print(f"Error: {message}", file=sys.stderr)
+
+
+def load_config():
+    from config.config_manager import ConfigManager
+    return ConfigManager(report_error=report_error)
+
+
+def parse_time(text):
+    """Parse --at as local time; a date alone means the end of that day"""
+    try:
+        moment = datetime.fromisoformat(text.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date or time: {text!r}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    if len(text.strip()) == len("YYYY-MM-DD"):
+        moment += timedelta(days=1, microseconds=-1)
+    return moment
+
+
+def require_save_dir(config_manager):
+    save_dir = config_manager.config["save_dir"]
+    if not os.path.exists(save_dir):
+        raise CliError(f"Save directory not found: {save_dir}", EXIT_NOT_FOUND)
+    return save_dir
+
+
+def require_github(config_manager):
+    config = config_manager.config
+    if not (config["github_token"] and config["github_repo"]):
+        raise CliError("GitHub settings are not configured. Set them in the app's Settings tab.",
+                       EXIT_NOT_CONFIGURED)
+
+
+def cmd_sync(args, config_manager):
+    from utils.github_manager import GitHubManager
+    require_github(config_manager)
+    require_save_dir(config_manager)
+    github_manager = GitHubManager(config_manager)
+    changed = github_manager.sync_saves()
+    return {"repo": config_manager.config["github_repo"], "changed": changed,
+            "summary": github_manager.last_changes}
+
+
+def cmd_backup(args, config_manager):
+    from utils.save_manager import SaveManager
+    require_save_dir(config_manager)
+    save_manager = SaveManager(config_manager)
+    backup_path = save_manager.create_backup()
+    result = {"backup_id": os.path.basename(backup_path)[:-len(".json")], "path": backup_path}
+    if args.gc:
+        result["gc"] = dict(zip(("objects_removed", "bytes_freed"), save_manager.gc_backups()))
+    return result
+
+
+def cmd_restore(args, config_manager):
+    if args.slot:
+        return restore_slot_version(args, config_manager)
+
+    from utils.save_manager import SaveManager
+    save_manager = SaveManager(config_manager)
+    backups = save_manager.list_backups()
+    if args.list:
+        return {"backups": backups}
+    if not backups:
+        raise CliError("No backups found", EXIT_NOT_FOUND)
+
+    backup_id = backups[-1]["backup_id"] if args.backup_id in (None, "latest") else args.backup_id
+    if backup_id not in [backup["backup_id"] for backup in backups]:
+        raise CliError(f"Backup not found: {backup_id}", EXIT_NOT_FOUND)
+    dest_dir = save_manager.restore_backup(backup_id, args.dest)
+    return {"backup_id": backup_id, "dest": dest_dir}
+
+
+def restore_slot_version(args, config_manager):
+    """Install a version of one slot from the slot history of the synced repo"""
+    from utils.github_manager import GitHubManager
+    from utils.save_manager import SaveManager
+    require_github(config_manager)
+    github_manager = GitHubManager(config_manager)
+    versions = github_manager.load_slot_history().versions(args.slot)
+    if args.list:
+        return {"slot": args.slot, "versions": versions}
+    if not versions:
+        raise CliError(f"No synced versions of {args.slot} found", EXIT_NOT_FOUND)
+
+    version = versions[0]
+    if args.at:
+        # Versions are newest first, so this is the newest one at or before --at
+        version = next((version for version in versions
+                        if datetime.fromisoformat(version["time"]) <= args.at), None)
+        if version is None:
+            raise CliError(f"No version of {args.slot} synced by {args.at:%Y-%m-%d %H:%M:%S}",
+                           EXIT_NOT_FOUND)
+
+    save_dir = require_save_dir(config_manager)
+    target_path = args.dest or os.path.join(save_dir, *args.slot.split("/"))
+    stats = SaveManager(config_manager).install_save(
+        target_path, lambda staging_dir: github_manager.download_slot_version(version, staging_dir))
+    return {"slot": args.slot, "version": version, "dest": target_path, "stats": stats}
+
+
+def cmd_download(args, config_manager):
+    from utils.github_api import get_github_api, parse_repo
+    from utils.friend_downloader import FriendDownloader
+    from utils.save_manager import SaveManager
+
+    config = config_manager.config
+    # Accept a friend's name from the Friends tab as well as a repo
+    friend = next((friend for friend in config["friends"] if friend["name"] == args.repo), None)
+    repo = parse_repo(friend["repo"] if friend else args.repo)
+    downloader = FriendDownloader(get_github_api(config["github_token"], config["github_api_url"]),
+                                  os.path.join(config_manager.config_dir, "blob_cache"))
+    slots = downloader.list_slots(repo)
+    if args.list or not args.slot:
+        return {"repo": repo, "slots": sorted(slots)}
+    if args.slot not in slots:
+        raise CliError(f"Save {args.slot} not found in {repo}", EXIT_NOT_FOUND)
+
+    # Same placement as the Friends tab: the matching local user folder, or the first one
+    save_dir = require_save_dir(config_manager)
+    save_manager = SaveManager(config_manager)
+    user_folders = save_manager.get_user_folders()
+    user_folder = args.user or args.slot.split("/")[0]
+    if user_folder not in user_folders and user_folders and not args.user:
+        user_folder = user_folders[0]
+    target_name = args.into or save_manager.get_next_save_slot(user_folder)
+    target_path = os.path.join(save_dir, user_folder, target_name)
+    stats = save_manager.install_save(
+        target_path, lambda staging_dir: downloader.download_slot(repo, slots[args.slot], staging_dir))
+    return {"repo": repo, "slot": args.slot, "dest": target_path, "stats": stats}
+
+
+def cmd_status(args, config_manager):
+    from utils.save_manager import SaveManager
+    from utils.diagnostics import DiagnosticsLog
+
+    config = config_manager.config
+    save_manager = SaveManager(config_manager)
+    backups = save_manager.list_backups()
+    last_runs = {}
+    for run in DiagnosticsLog(config_manager.config_dir).recent(args.runs):
+        last_runs.setdefault(run["operation"], {
+            key: run.get(key) for key in ("started", "status", "duration_s", "error")})
+    return {
+        "config_dir": config_manager.config_dir,
+        "save_dir": config["save_dir"],
+        "save_dir_exists": os.path.exists(config["save_dir"]),
+        "github_repo": config["github_repo"],
+        "github_configured": bool(config["github_token"] and config["github_repo"]),
+        "saves": {user_folder: {save: save_manager.get_save_summary(user_folder, save)
+                                for save in save_manager.get_save_games(user_folder)}
+                  for user_folder in save_manager.get_user_folders()},
+        "backups": len(backups),
+        "latest_backup": backups[-1] if backups else None,
+        "last_replace": save_manager.last_replace(),
+        "last_runs": last_runs
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="s1sync", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync = commands.add_parser("sync", help="sync the save folder to the configured GitHub repository")
+    sync.set_defaults(handler=cmd_sync)
+
+    backup = commands.add_parser("backup", help="create a local backup and prune old ones")
+    backup.add_argument("--gc", action="store_true",
+                        help="also remove stored objects no backup refers to (e.g. from failed backups)")
+    backup.set_defaults(handler=cmd_backup)
+
+    restore = commands.add_parser("restore", help="restore a local backup or a synced slot version")
+    restore.add_argument("backup_id", nargs="?", help="backup to restore (default: latest)")
+    restore.add_argument("--slot", help='restore this "<user>/<slot>" from the sync history instead')
+    restore.add_argument("--at", type=parse_time,
+                         help="with --slot: the newest version synced at or before this date or time")
+    restore.add_argument("--dest", help="write here instead of the save folder")
+    restore.add_argument("--list", action="store_true", help="list backups (or versions of --slot)")
+    restore.set_defaults(handler=cmd_restore)
+
+    download = commands.add_parser("download", help="download a save from a friend's repository")
+    download.add_argument("repo", help="friend name, owner/repo or repository URL")
+    download.add_argument("slot", nargs="?", help='"<user>/<slot>" to download; omit to list')
+    download.add_argument("--user", help="local user folder to install into")
+    download.add_argument("--into", help="slot to replace or create (default: next free SaveGame_<n>)")
+    download.add_argument("--list", action="store_true", help="list the saves in the repository")
+    download.set_defaults(handler=cmd_download)
+
+    status = commands.add_parser("status", help="show configuration, saves, backups and recent runs")
+    status.add_argument("--runs", type=int, default=50, help="log entries searched for recent runs")
+    status.set_defaults(handler=cmd_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = {"ok": True, "command": args.command}
+    exit_code = EXIT_OK
+    # Engine progress messages go to stderr so stdout stays one JSON document
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            result.update(args.handler(args, load_config()))
+        except CliError as e:
+            result.update(ok=False, error=str(e))
+            exit_code = e.exit_code
+        except Exception as e:
+            result.update(ok=False, error=str(e) or type(e).__name__)
+            exit_code = EXIT_FAILED
+    print(json.dumps(result, indent=2, default=str))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
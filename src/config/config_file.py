@@ -0,0 +1,49 @@
+import os
+import json
+from utils.file_lock import file_lock
+
+
+def write_json_atomic(path, data):
+    """Write data to path so readers see either the old or the new file, never part of one"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if os.name != "nt":
+        # Make the rename itself survive a power cut
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def read_json(path):
+    """Return the JSON object in path, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Warning: Ignoring unreadable {path}: {e}")
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def update_json_file(path, changes, fallback):
+    """Apply changes (key -> value) to the JSON object in path and return the result.
+
+    The file is re-read under the lock, so keys another process wrote since
+    we loaded it are kept. If it is missing or unreadable, changes are
+    applied to fallback (our full copy) instead.
+    """
+    with file_lock(path):
+        current = read_json(path)
+        merged = dict(fallback if current is None else current)
+        merged.update(changes)
+        if merged != current:
+            write_json_atomic(path, merged)
+    return merged
@@ -1,21 +1,58 @@
 import os
+import copy
 import json
-from tkinter import messagebox
+import atexit
+import threading
+from config.config_file import update_json_file
+from utils.save_compare import DEFAULT_VOLATILE_KEYS
+
+# save_config() only marks the config dirty; the file is written this many
+# seconds after the last call (or at exit), so a burst of changes is one write
+SAVE_DELAY = 1.0
+_MISSING = object()
+
+
+def show_error_dialog(message):
+    # Imported here so headless callers (the CLI) never load tkinter
+    from tkinter import messagebox
+    messagebox.showerror("Error", message)
+
 
 class ConfigManager:
-    def __init__(self):
-        self.default_save_dir = os.path.join(os.environ['USERPROFILE'], 
+    def __init__(self, report_error=show_error_dialog):
+        self.report_error = report_error
+        # USERPROFILE and APPDATA only exist on Windows; elsewhere fall back to
+        # the home and XDG config folders so the CLI also runs from a server
+        home = os.environ.get('USERPROFILE') or os.path.expanduser("~")
+        app_data = (os.environ.get('APPDATA') or os.environ.get('XDG_CONFIG_HOME')
+                    or os.path.join(home, ".config"))
+        self.default_save_dir = os.path.join(home, 
                                          "AppData", "LocalLow", "TVGS", "Schedule I", "Saves")
-        self.config_dir = os.path.join(os.environ['APPDATA'], "ScheduleISync")
+        self.config_dir = os.path.join(app_data, "ScheduleISync")
         self.config_file = os.path.join(self.config_dir, "config.json")
         self.config = self.load_config()
+        # What we last read from or wrote to the file; only keys that differ
+        # from it are written, so other processes' changes to other keys survive
+        self._saved = copy.deepcopy(self.config)
+        self._pending = None
+        self._timer = None
+        self._save_lock = threading.Lock()
+        atexit.register(self.flush)
 
     def load_config(self):
         default_config = {
             "save_dir": self.default_save_dir,
             "github_token": "",
             "github_repo": "",
-            "friends": []
+            "github_api_url": "https://api.github.com",
+            "upload_format": "raw",
+            "friends": [],
+            "friend_poll_interval": 300,
+            "auto_sync": False,
+            "auto_sync_action": "sync",
+            "auto_sync_delay": 30,
+            "backup_budget_mb": 1024,
+            "volatile_json_keys": list(DEFAULT_VOLATILE_KEYS)
         }
         
         if not os.path.exists(self.config_dir):
@@ -27,13 +64,49 @@ class ConfigManager:
                     loaded_config = json.load(f)
                     default_config.update(loaded_config)
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load config: {str(e)}")
+                self.report_error(f"Failed to load config: {str(e)}")
         
         return default_config
 
     def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save config: {str(e)}") 
\ No newline at end of file
+        """Schedule a write of the current config (see flush)"""
+        with self._save_lock:
+            # Copied now, so the write never sees a half-edited config
+            self._pending = copy.deepcopy(self.config)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(SAVE_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the settings changed since the last write, if any.
+
+        The file is re-read under a lock shared with other instances (the
+        CLI, S1SGSM), our changed keys are applied to it and the result is
+        written atomically. Keys another process changed are taken over.
+        Returns False if the write failed; it is retried by the next save.
+        """
+        with self._save_lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, None
+            if pending is None:
+                return True
+            changes = {key: value for key, value in pending.items()
+                       if self._saved.get(key, _MISSING) != value}
+            if not changes:
+                return True
+            try:
+                merged = update_json_file(self.config_file, changes, pending)
+            except Exception as e:
+                self._pending = pending
+                self.report_error(f"Failed to save config: {str(e)}")
+                return False
+
+            for key, value in merged.items():
+                if key not in changes and self._saved.get(key, _MISSING) != value:
+                    self.config[key] = value
+            self._saved = dict(self._saved, **copy.deepcopy(merged))
+            return True
@@ -1,9 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 from .tabs.my_saves_tab import MySavesTab
-from .tabs.friends_tab import FriendsTab
-from .tabs.settings_tab import SettingsTab
-from config.config_manager import ConfigManager
+from config.config_manager import ConfigManager, show_error_dialog
+from utils.job_runner import JobRunner
+from .friend_updates import FriendUpdates
 
 class ScheduleISyncApp:
     def __init__(self, root):
@@ -11,18 +11,75 @@ class ScheduleISyncApp:
         self.root.title("Schedule I Save Sync")
         self.root.geometry("800x600")
         
-        self.config_manager = ConfigManager()
+        self.job_runner = JobRunner(self.root)
+        # Config writes are delayed and may fail on a timer thread
+        self.config_manager = ConfigManager(
+            report_error=lambda message: self.job_runner.run_on_ui(show_error_dialog, message))
+        # Friends are checked for new saves all session, not only once their tab is opened
+        self.friend_updates = FriendUpdates(self.root, self.config_manager, self.job_runner)
         self.create_ui()
+        self.root.after_idle(self.friend_updates.poll)
     
     def create_ui(self):
+        # Status bar showing running background jobs
+        self.status_label = ttk.Label(self.root, text="Ready", anchor=tk.W)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
+        self.job_runner.add_listener(self.update_status)
+        
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create tabs
-        self.my_saves_tab = MySavesTab(self.notebook, self.config_manager)
-        self.friends_tab = FriendsTab(self.notebook, self.config_manager)
-        self.settings_tab = SettingsTab(self.notebook, self.config_manager)
+        # Only the first tab is built up front; the others (and the modules
+        # they import) are built the first time they are selected
+        self.my_saves_tab = MySavesTab(self.notebook, self.config_manager, self.job_runner)
+        self.friends_tab = None
+        self.settings_tab = None
+        self.diagnostics_tab = None
+        self.tab_builders = {}
         
         self.notebook.add(self.my_saves_tab, text="My Saves")
-        self.notebook.add(self.friends_tab, text="Friends' Saves")
-        self.notebook.add(self.settings_tab, text="Settings") 
\ No newline at end of file
+        self.add_lazy_tab("Friends' Saves", self.build_friends_tab)
+        self.add_lazy_tab("Settings", self.build_settings_tab)
+        self.add_lazy_tab("Diagnostics", self.build_diagnostics_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def add_lazy_tab(self, text, builder):
+        placeholder = ttk.Frame(self.notebook)
+        self.notebook.add(placeholder, text=text)
+        self.tab_builders[str(placeholder)] = (placeholder, builder)
+    
+    def on_tab_changed(self, event):
+        entry = self.tab_builders.pop(self.notebook.select(), None)
+        if entry:
+            placeholder, builder = entry
+            builder(placeholder).pack(fill=tk.BOTH, expand=True)
+    
+    def build_friends_tab(self, parent):
+        from .tabs.friends_tab import FriendsTab
+        self.friends_tab = FriendsTab(parent, self.config_manager, self.job_runner, self.friend_updates)
+        return self.friends_tab
+    
+    def build_settings_tab(self, parent):
+        from .tabs.settings_tab import SettingsTab
+        self.settings_tab = SettingsTab(parent, self.config_manager, 
+                                        on_save=self.my_saves_tab.update_auto_sync)
+        return self.settings_tab
+    
+    def build_diagnostics_tab(self, parent):
+        from .tabs.diagnostics_tab import DiagnosticsTab
+        self.diagnostics_tab = DiagnosticsTab(parent, self.config_manager)
+        return self.diagnostics_tab
+    
+    def update_status(self, event, job):
+        if event in ("done", "failed") and self.diagnostics_tab:
+            # The job may have logged a run
+            self.diagnostics_tab.refresh()
+        active = self.job_runner.active_jobs()
+        if active:
+            running = ", ".join(
+                f"{j.name} ({j.message})" if j.message else j.name for j in active)
+            self.status_label.config(text=f"Running: {running}")
+        elif event == "failed":
+            self.status_label.config(text=f"{job.name} failed")
+        else:
+            self.status_label.config(text="Ready")
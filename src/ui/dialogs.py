@@ -0,0 +1,33 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+def ask_choice(parent, title, prompt, options):
+    """Show a modal list of options and return the selected one (or None)"""
+    dialog = tk.Toplevel(parent)
+    dialog.title(title)
+    dialog.geometry("400x300")
+    dialog.transient(parent.winfo_toplevel())
+    dialog.grab_set()
+    
+    ttk.Label(dialog, text=prompt).pack(pady=10)
+    
+    listbox = tk.Listbox(dialog, width=50, height=10)
+    listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    for option in options:
+        listbox.insert(tk.END, option)
+    
+    selection = [None]
+    
+    def on_select():
+        if not listbox.curselection():
+            messagebox.showerror("Error", "Please make a selection")
+            return
+        selection[0] = listbox.get(listbox.curselection()[0])
+        dialog.destroy()
+    
+    ttk.Button(dialog, text="Select", command=on_select).pack(pady=5)
+    ttk.Button(dialog, text="Cancel", command=dialog.destroy).pack(pady=5)
+    
+    parent.wait_window(dialog)
+    return selection[0]
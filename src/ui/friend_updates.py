@@ -0,0 +1,78 @@
+from utils.github_api import get_github_api
+from utils.friend_poller import FriendPoller
+
+
+class FriendUpdates:
+    """Checks friends' repos for new commits every friend_poll_interval seconds.
+
+    Runs for the whole session, whether or not the Friends tab was opened.
+    New commit times and ETags are stored on the friends in the config,
+    which is saved once a poll changed something. Listeners are called on
+    the UI thread with ("started", None), ("updated", index of the friend)
+    and ("finished", None).
+    """
+
+    def __init__(self, root, config_manager, job_runner):
+        self.root = root
+        self.config_manager = config_manager
+        self.job_runner = job_runner
+        self.polling = False
+        self._changed = False
+        self._after_id = None
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def poll(self):
+        """Check every friend's repo now, then again after the poll interval"""
+        if self.polling:
+            return
+
+        friends = list(self.config_manager.config["friends"])
+        if not friends:
+            self._schedule()
+            return
+
+        config = self.config_manager.config
+        poller = FriendPoller(get_github_api(config["github_token"], config["github_api_url"]))
+        self.polling = True
+        self._changed = False
+        self._notify("started", None)
+        self.job_runner.submit(
+            "Checking friends' saves", poller.poll, friends,
+            lambda index, result: self.job_runner.run_on_ui(self._on_friend_polled, friends[index], result),
+            on_done=lambda result: self._on_poll_finished(),
+            on_error=lambda e: self._on_poll_finished())
+
+    def _on_friend_polled(self, friend, result):
+        if "error" in result:
+            print(f"Warning: Could not check {friend['name']}'s repository: {result['error']}")
+        if not result["changed"]:
+            return
+
+        # The friend may have been removed while the poll ran
+        for index, current in enumerate(self.config_manager.config["friends"]):
+            if current is friend:
+                friend["last_updated"] = result["last_updated"]
+                friend["etag"] = result["etag"]
+                self._changed = True
+                self._notify("updated", index)
+                break
+
+    def _on_poll_finished(self):
+        self.polling = False
+        if self._changed:
+            self.config_manager.save_config()
+        self._notify("finished", None)
+        self._schedule()
+
+    def _schedule(self):
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(
+            self.config_manager.config["friend_poll_interval"] * 1000, self.poll)
+
+    def _notify(self, event, index):
+        for listener in self._listeners:
+            listener(event, index)
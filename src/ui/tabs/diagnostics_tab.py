@@ -0,0 +1,115 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.diagnostics import DiagnosticsLog, phase_breakdown
+
+# Runs listed in the tab
+RECENT_RUNS = 100
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class DiagnosticsTab(ttk.Frame):
+    """Recent syncs, backups and downloads from the diagnostics log, with a per-phase breakdown"""
+
+    def __init__(self, parent, config_manager):
+        super().__init__(parent)
+        self.config_manager = config_manager
+        self.log = DiagnosticsLog(config_manager.config_dir)
+        self.runs = []
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        self.create_runs_frame()
+        self.create_phases_frame()
+
+    def create_runs_frame(self):
+        runs_frame = ttk.LabelFrame(self, text="Recent Runs")
+        runs_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        columns = ("started", "operation", "status", "duration", "files", "bytes", "api")
+        self.runs_tree = ttk.Treeview(runs_frame, columns=columns, show="headings", height=8)
+        for column, text, width in (("started", "Started", 140), ("operation", "Operation", 90),
+                                    ("status", "Status", 60), ("duration", "Duration", 70),
+                                    ("files", "Files Changed", 90), ("bytes", "Written", 80),
+                                    ("api", "API Calls", 70)):
+            self.runs_tree.heading(column, text=text)
+            self.runs_tree.column(column, width=width)
+
+        scrollbar = ttk.Scrollbar(runs_frame, orient=tk.VERTICAL, command=self.runs_tree.yview)
+        self.runs_tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.runs_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.runs_tree.bind("<<TreeviewSelect>>", self.on_run_selected)
+
+        refresh_btn = ttk.Button(runs_frame, text="Refresh", command=self.refresh)
+        refresh_btn.pack(anchor=tk.E, padx=5, pady=5)
+
+    def create_phases_frame(self):
+        phases_frame = ttk.LabelFrame(self, text="Phases")
+        phases_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        columns = ("seconds", "share", "calls")
+        self.phases_tree = ttk.Treeview(phases_frame, columns=columns, height=8)
+        self.phases_tree.heading("#0", text="Phase")
+        self.phases_tree.heading("seconds", text="Time (s)")
+        self.phases_tree.heading("share", text="Share")
+        self.phases_tree.heading("calls", text="Calls")
+        for column in columns:
+            self.phases_tree.column(column, width=80, anchor=tk.E)
+        self.phases_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.counters_label = ttk.Label(phases_frame, text="", wraplength=700, justify=tk.LEFT)
+        self.counters_label.pack(fill=tk.X, padx=5, pady=5)
+
+    def refresh(self):
+        """Reload the log and select the newest run"""
+        self.runs = self.log.recent(RECENT_RUNS)
+        self.runs_tree.delete(*self.runs_tree.get_children())
+        for index, run in enumerate(self.runs):
+            counters = run.get("counters", {})
+            files = counters.get("files_changed", counters.get("files_stored", counters.get("blobs_fetched", 0)))
+            written = counters.get("bytes_written", counters.get("bytes_copied", counters.get("bytes_downloaded", 0)))
+            self.runs_tree.insert("", tk.END, iid=str(index), values=(
+                run["started"].replace("T", " "),
+                run["operation"],
+                run["status"],
+                f"{run['duration_s']:.2f} s",
+                files,
+                format_bytes(written),
+                counters.get("api_requests", 0)))
+
+        if self.runs:
+            self.runs_tree.selection_set("0")
+        else:
+            self.show_run(None)
+
+    def on_run_selected(self, event):
+        selected = self.runs_tree.selection()
+        if selected:
+            self.show_run(self.runs[int(selected[0])])
+
+    def show_run(self, run):
+        self.phases_tree.delete(*self.phases_tree.get_children())
+        if run is None:
+            self.counters_label.config(text="No runs recorded yet.")
+            return
+
+        # Nested phases ("write/push") are shown under their parent
+        total = run["duration_s"] or 1
+        for name, seconds, calls in phase_breakdown(run):
+            parent, _, label = name.rpartition("/")
+            self.phases_tree.insert(parent if self.phases_tree.exists(parent) else "", tk.END,
+                                    iid=name, text=label, open=True,
+                                    values=(f"{seconds:.3f}", f"{seconds / total:.0%}", calls))
+
+        lines = [", ".join(f"{key}: {value}" for key, value in sorted(run.get("counters", {}).items()))]
+        if run.get("error"):
+            lines.append(f"Error: {run['error']}")
+        self.counters_label.config(text="\n".join(line for line in lines if line))
@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from utils.github_manager import GitHubManager
+import os
 from utils.save_manager import SaveManager
+from utils.github_api import get_github_api, parse_repo
+from utils.friend_downloader import FriendDownloader
+from ui.dialogs import ask_choice
 
 class FriendsTab(ttk.Frame):
-    def __init__(self, parent, config_manager):
+    def __init__(self, parent, config_manager, job_runner, friend_updates):
         super().__init__(parent)
         self.config_manager = config_manager
-        self.github_manager = GitHubManager(config_manager)
+        self.job_runner = job_runner
+        self.friend_updates = friend_updates
         self.save_manager = SaveManager(config_manager)
         self.setup_ui()
+        # The app polls friends in the background; keep the list in step
+        friend_updates.add_listener(self.on_friend_update)
 
     def setup_ui(self):
         # Add friend section
@@ -76,6 +82,17 @@ class FriendsTab(ttk.Frame):
         self.remove_friend_btn = ttk.Button(action_frame, text="Remove Friend", 
                                            command=self.remove_friend)
         self.remove_friend_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.check_updates_btn = ttk.Button(action_frame, text="Check for Updates", 
+                                           command=self.friend_updates.poll)
+        self.check_updates_btn.pack(side=tk.LEFT, padx=5)
+        if self.friend_updates.polling:
+            self.check_updates_btn.config(state=tk.DISABLED)
+        
+        self.undo_replace_btn = ttk.Button(action_frame, text="Undo Last Replace", 
+                                          command=self.undo_last_replace)
+        self.undo_replace_btn.pack(side=tk.LEFT, padx=5)
+        self.update_undo_button()
 
     def add_friend(self):
         repo_url = self.friend_repo_entry.get()
@@ -109,13 +126,22 @@ class FriendsTab(ttk.Frame):
             self.friends_tree.delete(item)
         
         # Add friends from config
-        for friend in self.config_manager.config["friends"]:
-            self.friends_tree.insert("", tk.END, values=(
+        for index, friend in enumerate(self.config_manager.config["friends"]):
+            self.friends_tree.insert("", tk.END, iid=str(index), values=(
                 friend["name"],
                 friend["repo"],
                 friend["last_updated"]
             ))
 
+    def on_friend_update(self, event, index):
+        if event == "started":
+            self.check_updates_btn.config(state=tk.DISABLED)
+        elif event == "finished":
+            self.check_updates_btn.config(state=tk.NORMAL)
+        else:
+            self.friends_tree.set(str(index), "last_updated",
+                                  self.config_manager.config["friends"][index]["last_updated"])
+
     def download_friend_save(self):
         selected = self.friends_tree.selection()
         if not selected:
@@ -128,10 +154,112 @@ class FriendsTab(ttk.Frame):
         friend_repo = item["values"][1]
         
         try:
-            # TODO: Implement download functionality
-            messagebox.showinfo("Download", f"Downloading save from {friend_name}'s repository...")
+            repo = parse_repo(friend_repo)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to download save: {str(e)}")
+            return
+        
+        # List the friend's save slots in the background
+        downloader = self.get_friend_downloader()
+        self.download_btn.config(state=tk.DISABLED)
+        self.job_runner.submit(
+            f"Listing {friend_name}'s saves", downloader.list_slots, repo,
+            on_done=lambda slots: self.choose_friend_save(downloader, friend_name, repo, slots),
+            on_error=self.on_download_error)
+
+    def get_friend_downloader(self):
+        config = self.config_manager.config
+        api = get_github_api(config["github_token"], config["github_api_url"])
+        return FriendDownloader(api, os.path.join(self.config_manager.config_dir, "blob_cache"))
+
+    def choose_friend_save(self, downloader, friend_name, repo, slots):
+        self.download_btn.config(state=tk.NORMAL)
+        if not slots:
+            messagebox.showerror("Error", f"No save games found in {friend_name}'s repository")
+            return
+        
+        selected_slot = ask_choice(self, f"Select {friend_name}'s Save Game",
+                                   f"Select which save game to download from {friend_name}:",
+                                   sorted(slots))
+        if selected_slot is None:
+            return  # User canceled
+        
+        # Put the save in the matching local user folder, or the first one we have
+        friend_user_folder = selected_slot.split("/")[0]
+        user_folders = self.save_manager.get_user_folders()
+        user_folder = friend_user_folder if friend_user_folder in user_folders or not user_folders else user_folders[0]
+        local_user_dir = os.path.join(self.config_manager.config["save_dir"], user_folder)
+        
+        replace_slot = None
+        choice = messagebox.askquestion("Save Location", 
+                                       f"Do you want to replace an existing save with {friend_name}'s save?\n\n"
+                                       f"Yes: Replace existing save\n"
+                                       f"No: Create a new save slot")
+        if choice == 'yes':
+            existing_saves = self.save_manager.get_save_games(user_folder)
+            if not existing_saves:
+                messagebox.showinfo("Info", "No existing saves found. Creating a new save slot.")
+            else:
+                replace_slot = ask_choice(self, "Select Save to Replace", 
+                                          "Select which save to replace:", existing_saves)
+                if replace_slot is None:
+                    return  # User canceled
+        
+        target_name = replace_slot or self.save_manager.get_next_save_slot(user_folder)
+        target_path = os.path.join(local_user_dir, target_name)
+        self.download_btn.config(state=tk.DISABLED)
+        self.job_runner.submit(
+            f"Downloading {friend_name}'s save", self.install_friend_save,
+            downloader, repo, slots[selected_slot], target_path,
+            on_done=lambda stats: self.on_download_done(friend_name, selected_slot, target_name, stats),
+            on_error=self.on_download_error)
+
+    def install_friend_save(self, downloader, repo, tree_sha, target_path):
+        """Download a slot next to target_path and swap it in (runs on a worker thread)"""
+        return self.save_manager.install_save(
+            target_path, lambda staging_dir: downloader.download_slot(repo, tree_sha, staging_dir))
+
+    def on_download_done(self, friend_name, selected_slot, target_name, stats):
+        self.download_btn.config(state=tk.NORMAL)
+        self.update_undo_button()
+        messagebox.showinfo("Success", 
+                            f"Downloaded {friend_name}'s save {selected_slot} into {target_name}\n\n"
+                            f"{stats['files']} files, {stats['fetched']} downloaded, "
+                            f"{stats['cached']} reused from cache")
+
+    def on_download_error(self, error):
+        self.download_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Failed to download save: {str(error)}")
+
+    def update_undo_button(self):
+        state = tk.NORMAL if self.save_manager.last_replace() else tk.DISABLED
+        self.undo_replace_btn.config(state=state)
+
+    def undo_last_replace(self):
+        last = self.save_manager.last_replace()
+        if not last:
+            self.update_undo_button()
+            return
+        
+        slot_name = os.path.basename(last["target"])
+        if last["undone"]:
+            question = f"Put the save downloaded into {slot_name} on {last['time']} back?"
+        elif last["replaced"]:
+            question = f"Restore {slot_name} to how it was before the download on {last['time']}?"
+        else:
+            question = f"Remove {slot_name}, which was created by the download on {last['time']}?"
+        if not messagebox.askyesno("Undo Last Replace", question):
+            return
+        
+        try:
+            last = self.save_manager.undo_last_replace()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to undo: {str(e)}\n\nMake sure the game is closed.")
+            return
+        if last["undone"]:
+            messagebox.showinfo("Undo Last Replace", f"{slot_name} has been undone. Click again to redo.")
+        else:
+            messagebox.showinfo("Undo Last Replace", f"The downloaded save is back in {slot_name}.")
 
     def remove_friend(self):
         selected = self.friends_tree.selection()
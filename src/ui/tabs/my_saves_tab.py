@@ -1,16 +1,23 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import os
 import webbrowser
 from utils.github_manager import GitHubManager
 from utils.save_manager import SaveManager
+from utils.save_watcher import SaveWatcher
+from ui.dialogs import ask_choice
 
 class MySavesTab(ttk.Frame):
-    def __init__(self, parent, config_manager):
+    def __init__(self, parent, config_manager, job_runner):
         super().__init__(parent)
         self.config_manager = config_manager
+        self.job_runner = job_runner
         self.github_manager = GitHubManager(config_manager)
         self.save_manager = SaveManager(config_manager)
+        self.save_watcher = None
+        self.auto_sync_pending = False
         self.setup_ui()
+        self.update_auto_sync()
 
     def setup_ui(self):
         frame = ttk.LabelFrame(self, text="My Save Files")
@@ -40,6 +47,10 @@ class MySavesTab(ttk.Frame):
         ttk.Label(status_frame, text="Last Sync:").grid(row=2, column=0, sticky=tk.W, pady=5)
         self.last_sync_label = ttk.Label(status_frame, text="Never")
         self.last_sync_label.grid(row=2, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(status_frame, text="Last Changes:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.last_changes_label = ttk.Label(status_frame, text="")
+        self.last_changes_label.grid(row=3, column=1, sticky=tk.W, pady=5)
     
     def create_button_frame(self, parent):
         button_frame = ttk.Frame(parent)
@@ -52,6 +63,10 @@ class MySavesTab(ttk.Frame):
         self.backup_btn = ttk.Button(button_frame, text="Create Local Backup", 
                                     command=self.create_backup)
         self.backup_btn.pack(side=tk.LEFT, padx=10)
+        
+        self.restore_btn = ttk.Button(button_frame, text="Restore Older Version",
+                                     command=self.restore_older_version)
+        self.restore_btn.pack(side=tk.LEFT, padx=10)
     
     def create_link_frame(self, parent):
         link_frame = ttk.Frame(parent)
@@ -61,19 +76,123 @@ class MySavesTab(ttk.Frame):
                                        command=self.open_github_repo)
         self.open_repo_btn.pack(side=tk.LEFT, padx=10)
     
-    def sync_to_github(self):
-        try:
-            self.github_manager.sync_saves()
+    def update_auto_sync(self):
+        """Start or stop the save directory watcher to match the settings"""
+        if self.save_watcher:
+            self.save_watcher.stop()
+            self.save_watcher = None
+        
+        config = self.config_manager.config
+        self.save_dir_label.config(text=config["save_dir"])
+        self.repo_label.config(text=config["github_repo"] or "Not configured")
+        if config["auto_sync"]:
+            self.save_watcher = SaveWatcher(
+                config["save_dir"],
+                lambda: self.job_runner.run_on_ui(self.on_saves_settled),
+                settle_delay=config["auto_sync_delay"])
+            self.save_watcher.start()
+    
+    def on_saves_settled(self):
+        """Run the configured auto-sync action once the game stopped writing"""
+        if self.config_manager.config["auto_sync_action"] == "backup":
+            if str(self.backup_btn["state"]) != tk.DISABLED:
+                self.create_backup(quiet=True)
+        elif str(self.sync_btn["state"]) == tk.DISABLED:
+            # A sync is already running; run once more when it finishes
+            self.auto_sync_pending = True
+        else:
+            self.sync_to_github(quiet=True)
+    
+    def sync_to_github(self, quiet=False):
+        self.sync_btn.config(state=tk.DISABLED)
+        self.last_sync_label.config(text="Syncing...")
+        self.job_runner.submit("Auto sync" if quiet else "Sync to GitHub", self.github_manager.sync_saves,
+                               on_done=self.on_sync_done, 
+                               on_error=lambda e: self.on_sync_error(e, quiet))
+    
+    def on_sync_done(self, changed_count):
+        self.sync_btn.config(state=tk.NORMAL)
+        self.last_sync_label.config(text=self.github_manager.last_sync_time)
+        self.last_changes_label.config(text=self.github_manager.last_changes)
+        if self.auto_sync_pending:
+            self.auto_sync_pending = False
+            self.sync_to_github(quiet=True)
+    
+    def on_sync_error(self, error, quiet=False):
+        self.sync_btn.config(state=tk.NORMAL)
+        self.auto_sync_pending = False
+        if quiet:
+            self.last_sync_label.config(text=f"Auto sync failed: {error}")
+        else:
             self.last_sync_label.config(text=self.github_manager.last_sync_time)
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+            messagebox.showerror("Error", str(error))
+    
+    def create_backup(self, quiet=False):
+        self.backup_btn.config(state=tk.DISABLED)
+        self.job_runner.submit("Auto backup" if quiet else "Backup", self.save_manager.create_backup,
+                               on_done=lambda path: self.on_backup_done(path, quiet),
+                               on_error=lambda e: self.on_backup_error(e, quiet))
     
-    def create_backup(self):
-        try:
-            backup_path = self.save_manager.create_backup()
+    def on_backup_done(self, backup_path, quiet=False):
+        self.backup_btn.config(state=tk.NORMAL)
+        if not quiet:
             messagebox.showinfo("Backup", f"Backup created successfully at:\n{backup_path}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+    
+    def on_backup_error(self, error, quiet=False):
+        self.backup_btn.config(state=tk.NORMAL)
+        if quiet:
+            print(f"Warning: Auto backup failed: {error}")
+        else:
+            messagebox.showerror("Error", str(error))
+    
+    def restore_older_version(self):
+        self.restore_btn.config(state=tk.DISABLED)
+        self.job_runner.submit("Loading save history", self.github_manager.load_slot_history,
+                               on_done=self.choose_version,
+                               on_error=self.on_restore_error)
+    
+    def choose_version(self, history):
+        self.restore_btn.config(state=tk.NORMAL)
+        if not history.slot_names():
+            messagebox.showinfo("Restore Older Version",
+                                "No save history found yet. Sync to GitHub to start recording versions.")
+            return
+        
+        slot = ask_choice(self, "Select Save", "Select which save to restore:", history.slot_names())
+        if slot is None:
+            return  # User canceled
+        
+        versions = history.versions(slot)
+        labels = [version["time"].replace("T", " ") for version in versions]
+        labels[0] += " (latest)"
+        label = ask_choice(self, "Select Version", f"Restore {slot} as of:", labels)
+        if label is None:
+            return
+        version = versions[labels.index(label)]
+        
+        if not messagebox.askyesno("Restore Older Version",
+                                   f"Replace {slot} with the version synced on {label}?\n\n"
+                                   f"Use Undo Last Replace on the Friends tab to go back."):
+            return
+        
+        target_path = os.path.join(self.config_manager.config["save_dir"], *slot.split("/"))
+        self.restore_btn.config(state=tk.DISABLED)
+        self.job_runner.submit(
+            f"Restoring {slot}", self.save_manager.install_save, target_path,
+            lambda staging_dir: self.github_manager.download_slot_version(version, staging_dir),
+            on_done=lambda stats: self.on_restore_done(slot, label, stats),
+            on_error=self.on_restore_error)
+    
+    def on_restore_done(self, slot, label, stats):
+        self.restore_btn.config(state=tk.NORMAL)
+        messagebox.showinfo("Restore Older Version",
+                            f"Restored {slot} as of {label}\n\n"
+                            f"{stats['files']} files, {stats['fetched']} downloaded, "
+                            f"{stats['cached']} reused from cache")
+    
+    def on_restore_error(self, error):
+        self.restore_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Failed to restore save: {str(error)}")
     
     def open_github_repo(self):
         if self.config_manager.config["github_repo"]:
@@ -3,9 +3,10 @@ from tkinter import ttk, messagebox, filedialog
 import webbrowser
 
 class SettingsTab(ttk.Frame):
-    def __init__(self, parent, config_manager):
+    def __init__(self, parent, config_manager, on_save=None):
         super().__init__(parent)
         self.config_manager = config_manager
+        self.on_save = on_save
         self.setup_ui()
 
     def setup_ui(self):
@@ -18,9 +19,18 @@ class SettingsTab(ttk.Frame):
         # GitHub settings
         self.create_github_settings(settings_frame)
         
+        # Auto-sync settings
+        self.create_auto_sync_settings(settings_frame)
+        
+        # Backup retention settings
+        self.create_backup_settings(settings_frame)
+        
+        # Keys that do not count as changes
+        self.create_change_detection_settings(settings_frame)
+        
         # Save settings button
         save_btn = ttk.Button(settings_frame, text="Save Settings", command=self.save_settings)
-        save_btn.grid(row=4, column=1, sticky=tk.E, padx=5, pady=20)
+        save_btn.grid(row=7, column=1, sticky=tk.E, padx=5, pady=20)
         
         # Help section
         self.create_help_section(settings_frame)
@@ -74,9 +84,57 @@ class SettingsTab(ttk.Frame):
                                   ))
         repo_help_btn.pack(side=tk.LEFT, padx=5)
 
+    def create_auto_sync_settings(self, parent):
+        ttk.Label(parent, text="Auto Sync:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=10)
+        
+        auto_frame = ttk.Frame(parent)
+        auto_frame.grid(row=3, column=1, sticky=tk.W, padx=5, pady=10)
+        
+        self.auto_sync_var = tk.BooleanVar(value=self.config_manager.config["auto_sync"])
+        ttk.Checkbutton(auto_frame, text="When the game saves, after", 
+                        variable=self.auto_sync_var).pack(side=tk.LEFT, padx=5)
+        
+        self.auto_sync_delay_var = tk.StringVar(value=str(self.config_manager.config["auto_sync_delay"]))
+        ttk.Spinbox(auto_frame, from_=5, to=600, width=5, 
+                    textvariable=self.auto_sync_delay_var).pack(side=tk.LEFT)
+        ttk.Label(auto_frame, text="seconds:").pack(side=tk.LEFT, padx=5)
+        
+        self.auto_sync_action_var = tk.StringVar(value=self.config_manager.config["auto_sync_action"])
+        ttk.Radiobutton(auto_frame, text="Sync to GitHub", value="sync", 
+                        variable=self.auto_sync_action_var).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(auto_frame, text="Local Backup", value="backup", 
+                        variable=self.auto_sync_action_var).pack(side=tk.LEFT, padx=5)
+        
+        self.packed_upload_var = tk.BooleanVar(value=self.config_manager.config["upload_format"] == "packed")
+        ttk.Checkbutton(parent, text="Upload each save slot as one compressed archive (smaller, faster for friends)", 
+                        variable=self.packed_upload_var).grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+
+    def create_backup_settings(self, parent):
+        ttk.Label(parent, text="Local Backups:").grid(row=5, column=0, sticky=tk.W, padx=5, pady=10)
+        
+        backup_frame = ttk.Frame(parent)
+        backup_frame.grid(row=5, column=1, sticky=tk.W, padx=5, pady=10)
+        
+        ttk.Label(backup_frame, text="Keep hourly, daily and weekly backups, using at most").pack(side=tk.LEFT, padx=5)
+        self.backup_budget_var = tk.StringVar(value=str(self.config_manager.config["backup_budget_mb"]))
+        ttk.Spinbox(backup_frame, from_=50, to=100000, increment=50, width=7, 
+                    textvariable=self.backup_budget_var).pack(side=tk.LEFT)
+        ttk.Label(backup_frame, text="MB").pack(side=tk.LEFT, padx=5)
+
+    def create_change_detection_settings(self, parent):
+        ttk.Label(parent, text="Ignore Changes To:").grid(row=6, column=0, sticky=tk.W, padx=5, pady=10)
+        
+        keys_frame = ttk.Frame(parent)
+        keys_frame.grid(row=6, column=1, sticky=tk.W, padx=5, pady=10)
+        
+        self.volatile_keys_entry = ttk.Entry(keys_frame, width=50)
+        self.volatile_keys_entry.insert(0, ", ".join(self.config_manager.config["volatile_json_keys"]))
+        self.volatile_keys_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(keys_frame, text="(JSON keys, comma separated)").pack(side=tk.LEFT, padx=5)
+
     def create_help_section(self, parent):
         help_frame = ttk.LabelFrame(parent, text="Help")
-        help_frame.grid(row=5, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=10)
+        help_frame.grid(row=8, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=10)
         help_text = (
             "1. Create a GitHub Personal Access Token:\n"
             "   - Go to GitHub.com and log in\n"
@@ -110,7 +168,24 @@ class SettingsTab(ttk.Frame):
         self.config_manager.config["save_dir"] = self.save_dir_entry.get()
         self.config_manager.config["github_token"] = self.token_entry.get()
         self.config_manager.config["github_repo"] = self.repo_entry.get()
+        self.config_manager.config["auto_sync"] = self.auto_sync_var.get()
+        self.config_manager.config["auto_sync_action"] = self.auto_sync_action_var.get()
+        self.config_manager.config["upload_format"] = "packed" if self.packed_upload_var.get() else "raw"
+        try:
+            self.config_manager.config["auto_sync_delay"] = max(5, int(self.auto_sync_delay_var.get()))
+        except ValueError:
+            messagebox.showerror("Error", "Auto sync delay must be a whole number of seconds")
+            return
+        try:
+            self.config_manager.config["backup_budget_mb"] = max(1, int(self.backup_budget_var.get()))
+        except ValueError:
+            messagebox.showerror("Error", "Backup space limit must be a whole number of MB")
+            return
+        self.config_manager.config["volatile_json_keys"] = [
+            key.strip() for key in self.volatile_keys_entry.get().split(",") if key.strip()]
         
         # Save to file
         self.config_manager.save_config()
+        if self.on_save:
+            self.on_save()
         messagebox.showinfo("Settings", "Settings saved successfully!") 
\ No newline at end of file
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+# Every backup younger than this is kept
+KEEP_ALL = timedelta(hours=1)
+# After that, the newest backup of each hour, day and ISO week is kept for
+# this long (measured from now)
+KEEP_HOURLY = timedelta(hours=24)
+KEEP_DAILY = timedelta(days=7)
+KEEP_WEEKLY = timedelta(weeks=8)
+
+DEFAULT_BUDGET_MB = 1024
+
+
+def _generation(created, age):
+    """Return the bucket a backup of this age competes in, or None if it is too old"""
+    if age <= KEEP_HOURLY:
+        return ("hour", created.strftime("%Y-%m-%d %H"))
+    if age <= KEEP_DAILY:
+        return ("day", created.strftime("%Y-%m-%d"))
+    if age <= KEEP_WEEKLY:
+        return ("week", created.isocalendar()[:2])
+    return None
+
+
+def plan_retention(backups, now=None, budget_bytes=None, backup_bytes=None):
+    """Return the ids of the backups to delete.
+
+    backups are catalog rows ({"backup_id", "created", ...}), oldest first.
+    Every backup from the last hour is kept, then the newest one per hour
+    for a day, per day for a week and per week for eight weeks. If
+    budget_bytes is set, the oldest survivors are dropped until
+    backup_bytes(ids) of the rest fits. The newest backup is always kept.
+    """
+    now = now or datetime.now()
+    keep = []
+    buckets = set()
+    for index, backup in enumerate(reversed(backups)):
+        try:
+            created = datetime.fromisoformat(backup["created"])
+        except (TypeError, ValueError):
+            # No usable date; leave it to the size budget
+            keep.append(backup["backup_id"])
+            continue
+        age = now - created
+        if index == 0 or age <= KEEP_ALL:
+            keep.append(backup["backup_id"])
+            continue
+        bucket = _generation(created, age)
+        if bucket is not None and bucket not in buckets:
+            buckets.add(bucket)
+            keep.append(backup["backup_id"])
+
+    # keep is newest first; trim from the old end to fit the budget
+    if budget_bytes is not None and backup_bytes is not None:
+        while len(keep) > 1 and backup_bytes(keep) > budget_bytes:
+            keep.pop()
+
+    kept = set(keep)
+    return [backup["backup_id"] for backup in backups if backup["backup_id"] not in kept]
+
+
+def prune_backups(backup_store, catalog, budget_mb=DEFAULT_BUDGET_MB, now=None):
+    """Apply the retention plan to a backup store.
+
+    Planning only reads the catalog index, and only the objects of the
+    deleted backups that nothing else uses are removed, so this is cheap
+    enough to run after every backup. It holds the store's lock, so backups
+    in other processes wait. Returns (backups deleted, bytes freed).
+    """
+    with backup_store.locked():
+        catalog.refresh_backups(backup_store)
+        budget_bytes = budget_mb * 1024 * 1024 if budget_mb else None
+        doomed = plan_retention(catalog.backups(backup_store.root), now, budget_bytes, catalog.backup_bytes)
+        if not doomed:
+            return 0, 0
+
+        orphaned = catalog.orphaned_objects(doomed)
+        for backup_id in doomed:
+            backup_store.delete_backup(backup_id)
+        catalog.refresh_backups(backup_store)
+        removed, freed = backup_store.delete_objects(orphaned)
+        return len(doomed), freed
@@ -0,0 +1,240 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from utils.manifest import iter_files, is_unchanged_entry, HASH_CHUNK_SIZE
+from utils.copy_engine import get_copy_engine
+from utils.diagnostics import span, count
+from utils.file_lock import file_lock
+from utils.save_compare import hash_save_file, is_volatile_rewrite
+
+# Serialises backup id allocation between concurrent backup jobs
+_manifest_lock = threading.Lock()
+
+
+class BackupStore:
+    """Content-addressed store for save backups.
+
+    File contents live once under objects/<aa>/<sha1>; each backup is a small
+    JSON manifest (backup_<timestamp>.json) that maps save paths to object
+    hashes. A new backup only writes the files whose contents are not in the
+    store yet. With volatile_keys, a JSON file that only differs from the
+    latest backup in those keys keeps pointing at the backed-up version.
+    """
+
+    def __init__(self, root, volatile_keys=None):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.volatile_keys = volatile_keys
+
+    def create_backup(self, source_dir):
+        """Back up source_dir and return the path of the new backup manifest"""
+        if not os.path.exists(source_dir):
+            raise Exception(f"Save directory not found: {source_dir}")
+
+        # Pruning in another process must not delete objects this backup reuses
+        with self.locked():
+            os.makedirs(self.objects_dir, exist_ok=True)
+
+            # Reuse hashes from the latest backup for files that did not change
+            backups = self.list_backups()
+            previous = self.load_backup(backups[-1])["files"] if backups else {}
+
+            files = {}
+            to_store = []
+            with span("scan"):
+                for rel_path, path, st in iter_files(source_dir):
+                    entry = previous.get(rel_path)
+                    if (is_unchanged_entry(entry, st)
+                            and os.path.exists(self._object_path(entry["sha1"]))):
+                        files[rel_path] = entry
+                    else:
+                        files[rel_path] = {
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                            "sha1": None
+                        }
+                        to_store.append((rel_path, path))
+
+            # Hash and copy new contents into the store in parallel
+            with span("store objects"):
+                results, errors = get_copy_engine().run(
+                    lambda item: self._store_file(item[1], previous.get(item[0])), to_store)
+            if errors:
+                # No backup will refer to the objects this one already stored
+                self._collect()
+                (rel_path, _), error = errors[0]
+                raise Exception(f"Failed to back up {rel_path}: {error}")
+            ignored = 0
+            for (rel_path, _), stored in results:
+                if stored is None:
+                    scanned = files[rel_path]
+                    files[rel_path] = dict(previous[rel_path], local=[scanned["size"], scanned["mtime_ns"]])
+                    ignored += 1
+                    continue
+                files[rel_path]["sha1"], semantic = stored
+                if semantic:
+                    files[rel_path]["sem"] = semantic
+            count("files_scanned", len(files))
+            count("files_stored", len(to_store) - ignored)
+            count("files_ignored", ignored)
+
+            with _manifest_lock:
+                backup_id = self._new_backup_id()
+                manifest_path = self._manifest_path(backup_id)
+                tmp_path = manifest_path + ".tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump({
+                        "id": backup_id,
+                        "created": datetime.now().isoformat(timespec="seconds"),
+                        "source": source_dir,
+                        "files": files
+                    }, f)
+                os.replace(tmp_path, manifest_path)
+            return manifest_path
+
+    def list_backups(self):
+        """Return backup ids, oldest first"""
+        if not os.path.exists(self.root):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(self.root)
+                      if name.startswith("backup_") and name.endswith(".json"))
+
+    def load_backup(self, backup_id):
+        with open(self._manifest_path(backup_id), 'r') as f:
+            return json.load(f)
+
+    def restore(self, backup_id, dest_dir, paths=None, prefix=""):
+        """Write the files of a backup into dest_dir.
+
+        paths limits the restore to those backup paths, and prefix is cut
+        from the front of each one (to restore a slot into its own folder).
+        """
+        with self.locked():
+            self._restore(backup_id, dest_dir, paths, prefix)
+        return dest_dir
+
+    def locked(self):
+        """Hold the store's lock, shared by every process using this store.
+
+        Backups, restores and pruning take it, so pruning never deletes an
+        object that a backup running elsewhere reuses or has just stored.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        return file_lock(os.path.join(self.root, "store"))
+
+    def _restore(self, backup_id, dest_dir, paths, prefix):
+        files = self.load_backup(backup_id)["files"]
+        for rel_path in files if paths is None else paths:
+            entry = files[rel_path]
+            dst = os.path.join(dest_dir, *rel_path[len(prefix):].split("/"))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp_dst = dst + ".s1sync-tmp"
+            with open(self._object_path(entry["sha1"]), 'rb') as src_f, open(tmp_dst, 'wb') as dst_f:
+                for chunk in iter(lambda: src_f.read(HASH_CHUNK_SIZE), b''):
+                    dst_f.write(chunk)
+            os.replace(tmp_dst, dst)
+            os.utime(dst, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    def delete_backup(self, backup_id):
+        """Remove a backup manifest; prune_backups (or gc) frees the objects only it used"""
+        os.remove(self._manifest_path(backup_id))
+
+    def gc(self):
+        """Remove objects no backup refers to. Returns (objects removed, bytes freed)"""
+        with self.locked():
+            return self._collect()
+
+    def _collect(self):
+        referenced = set()
+        for backup_id in self.list_backups():
+            referenced.update(entry["sha1"] for entry in self.load_backup(backup_id)["files"].values())
+
+        removed = 0
+        freed = 0
+        if not os.path.exists(self.objects_dir):
+            return removed, freed
+        for name in os.listdir(self.objects_dir):
+            path = os.path.join(self.objects_dir, name)
+            if name.startswith("tmp_") and os.path.isfile(path):
+                # Left by a backup that crashed; the lock means none is running
+                freed += os.path.getsize(path)
+                os.remove(path)
+                continue
+            if not os.path.isdir(path):
+                continue
+            for object_name in os.listdir(path):
+                if object_name in referenced:
+                    continue
+                object_path = os.path.join(path, object_name)
+                freed += os.path.getsize(object_path)
+                os.remove(object_path)
+                removed += 1
+            if not os.listdir(path):
+                os.rmdir(path)
+        return removed, freed
+
+    def delete_objects(self, sha1s):
+        """Remove the given objects. Returns (objects removed, bytes freed)"""
+        removed = 0
+        freed = 0
+        for sha1 in sha1s:
+            path = self._object_path(sha1)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass  # Other objects share the folder
+        return removed, freed
+
+    def _object_path(self, sha1):
+        return os.path.join(self.objects_dir, sha1[:2], sha1)
+
+    def _manifest_path(self, backup_id):
+        return os.path.join(self.root, f"{backup_id}.json")
+
+    def _new_backup_id(self):
+        backup_id = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        count = 1
+        candidate = backup_id
+        while os.path.exists(self._manifest_path(candidate)):
+            candidate = f"{backup_id}_{count}"
+            count += 1
+        return candidate
+
+    def _store_file(self, path, previous_entry):
+        """Store a changed file unless only its volatile keys changed.
+
+        Returns (sha1, semantic hash), or None to keep previous_entry.
+        """
+        semantic = None
+        if self.volatile_keys:
+            sha1, semantic = hash_save_file(path, self.volatile_keys)
+            if (is_volatile_rewrite(previous_entry, sha1, semantic)
+                    and os.path.exists(self._object_path(previous_entry["sha1"]))):
+                return None
+        return self._store_object(path), semantic
+
+    def _store_object(self, path):
+        """Copy a file into the store, hashing it on the way. Returns its SHA-1"""
+        tmp_path = os.path.join(self.objects_dir, f"tmp_{os.getpid()}_{threading.get_ident()}")
+        digest = hashlib.sha1()
+        with open(path, 'rb') as src_f, open(tmp_path, 'wb') as dst_f:
+            for chunk in iter(lambda: src_f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                dst_f.write(chunk)
+        sha1 = digest.hexdigest()
+        object_path = self._object_path(sha1)
+        if os.path.exists(object_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(tmp_path, object_path)
+        return sha1
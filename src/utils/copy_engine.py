@@ -0,0 +1,140 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.diagnostics import current_run, attached, count
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def copy_file(src, dst):
+    """Copy file contents and metadata, using the kernel fast paths when available"""
+    with open(src, 'rb') as src_f, open(dst, 'wb') as dst_f:
+        size = os.fstat(src_f.fileno()).st_size
+        if not _copy_in_kernel(src_f.fileno(), dst_f.fileno(), size):
+            src_f.seek(0)
+            dst_f.seek(0)
+            dst_f.truncate()
+            shutil.copyfileobj(src_f, dst_f, COPY_BUFFER_SIZE)
+    shutil.copystat(src, dst)
+    return size
+
+
+def _copy_in_kernel(src_fd, dst_fd, size):
+    """Try copy_file_range, then sendfile. Returns False if neither applies"""
+    for name in ("copy_file_range", "sendfile"):
+        func = getattr(os, name, None)
+        if func is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if name == "copy_file_range":
+                    sent = func(src_fd, dst_fd, size - offset)
+                else:
+                    sent = func(dst_fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            # Not supported for this pair of files (e.g. cross-device on an
+            # older kernel or a network share); fall through to the next path
+            if offset:
+                return False
+            continue
+        return offset == size
+    return False
+
+
+class CopyResult:
+    """Outcome of a CopyEngine batch: files done, bytes written, per-file errors"""
+
+    def __init__(self):
+        self.copied = []
+        self.bytes = 0
+        self.errors = []
+
+    def raise_errors(self):
+        if self.errors:
+            path, error = self.errors[0]
+            more = f" (and {len(self.errors) - 1} more)" if len(self.errors) > 1 else ""
+            raise Exception(f"Failed to copy {path}: {error}{more}")
+
+
+class CopyEngine:
+    """Copies many files at once on a bounded thread pool.
+
+    Save trees are mostly thousands of small JSON files, where per-file
+    open/close latency dominates, so copies are spread over several threads.
+    Errors are collected per file instead of aborting the batch.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="s1sync-copy")
+
+    def run(self, func, items):
+        """Call func(item) for every item in parallel.
+
+        Returns a list of (item, result) for successful calls and a list of
+        (item, error) for failed ones, both in input order.
+        """
+        items = list(items)
+        run = current_run()
+        if run is not None:
+            # Let the workers add to the caller's diagnostics counters
+            work = func
+            func = lambda item: self._call_in_run(run, work, item)
+        futures = [self._executor.submit(func, item) for item in items]
+        results = []
+        errors = []
+        for item, future in zip(items, futures):
+            try:
+                results.append((item, future.result()))
+            except Exception as e:
+                errors.append((item, e))
+        return results, errors
+
+    def _call_in_run(self, run, func, item):
+        with attached(run):
+            return func(item)
+
+    def copy_files(self, pairs):
+        """Copy each (src, dst) pair, creating destination folders as needed"""
+        pairs = list(pairs)
+        for folder in {os.path.dirname(dst) for _, dst in pairs}:
+            os.makedirs(folder, exist_ok=True)
+
+        results, errors = self.run(lambda pair: copy_file(*pair), pairs)
+        result = CopyResult()
+        for (src, dst), size in results:
+            result.copied.append(dst)
+            result.bytes += size
+        result.errors = [(src, error) for (src, dst), error in errors]
+        count("files_copied", len(result.copied))
+        count("bytes_copied", result.bytes)
+        return result
+
+    def copy_tree(self, src_dir, dst_dir):
+        """Copy a whole folder like shutil.copytree, but with parallel file copies"""
+        pairs = []
+        for dirpath, dirnames, filenames in os.walk(src_dir):
+            target_dir = os.path.join(dst_dir, os.path.relpath(dirpath, src_dir))
+            os.makedirs(target_dir, exist_ok=True)
+            for name in filenames:
+                pairs.append((os.path.join(dirpath, name), os.path.join(target_dir, name)))
+        return self.copy_files(pairs)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_copy_engine():
+    """Return the process-wide CopyEngine shared by backup, sync and download"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = CopyEngine()
+        return _default_engine
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import threading
+import contextlib
+from datetime import datetime
+
+LOG_NAME = "diagnostics.jsonl"
+# The log is rotated to diagnostics.jsonl.1, .2, ... once it reaches this size
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class RunTrace:
+    """Phase timings and counters of one operation (a sync, a backup, ...).
+
+    Phases are recorded by span() on the thread that runs the operation,
+    nested spans as "outer/inner". Counters may also be bumped from copy
+    engine workers, which run with the trace of the thread that started them.
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.started = datetime.now()
+        self.phases = []
+        self.counters = {}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self, duration, error=None):
+        return {
+            "operation": self.operation,
+            "started": self.started.isoformat(timespec="seconds"),
+            "duration_s": round(duration, 4),
+            "status": "failed" if error else "ok",
+            "error": error,
+            "phases": [{"name": name, "duration_s": round(seconds, 4)} for name, seconds in self.phases],
+            "counters": dict(self.counters)
+        }
+
+
+def current_run():
+    """Return the RunTrace of the calling thread, or None"""
+    return getattr(_local, "run", None)
+
+
+@contextlib.contextmanager
+def attached(run):
+    """Make run the current trace of this thread while the block runs"""
+    previous = current_run()
+    _local.run = run
+    try:
+        yield run
+    finally:
+        _local.run = previous
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time a phase of the current operation; does nothing outside one"""
+    run = current_run()
+    if run is None:
+        yield
+        return
+    run.spans.append(name)
+    # Listed in start order, so an outer phase comes before its parts
+    phase = ["/".join(run.spans), 0.0]
+    with run._lock:
+        run.phases.append(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.spans.pop()
+        phase[1] = time.perf_counter() - start
+
+
+def count(name, amount=1):
+    """Add to a counter of the current operation; does nothing outside one"""
+    run = current_run()
+    if run is not None and amount:
+        run.count(name, amount)
+
+
+@contextlib.contextmanager
+def trace_run(operation, log_dir):
+    """Trace an operation and append it to the diagnostics log in log_dir.
+
+    Inside another traced operation (e.g. the backup taken before an
+    install) it becomes a phase of the outer one instead.
+    """
+    if current_run() is not None:
+        with span(operation):
+            yield current_run()
+        return
+
+    run = RunTrace(operation)
+    start = time.perf_counter()
+    error = None
+    with attached(run):
+        try:
+            yield run
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            DiagnosticsLog(log_dir).append(run.to_dict(time.perf_counter() - start, error))
+
+
+class DiagnosticsLog:
+    """Rotating JSON-lines log of traced operations, one run per line"""
+
+    def __init__(self, log_dir):
+        self.log_file = os.path.join(log_dir, LOG_NAME)
+
+    def append(self, record):
+        # Diagnostics must never fail the operation they describe
+        try:
+            with _log_lock:
+                os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                if os.path.exists(self.log_file) and os.path.getsize(self.log_file) >= MAX_LOG_BYTES:
+                    self._rotate()
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+        except Exception as e:
+            print(f"Warning: Could not write diagnostics log: {e}")
+
+    def recent(self, limit=100):
+        """Return up to limit logged runs, newest first"""
+        runs = []
+        for index in range(LOG_BACKUPS + 1):
+            path = self.log_file + (f".{index}" if index else "")
+            if not os.path.exists(path):
+                break
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            except OSError as e:
+                print(f"Warning: Could not read {path}: {e}")
+                break
+            for line in reversed(lines):
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(runs) >= limit:
+                    return runs
+        return runs
+
+    def _rotate(self):
+        oldest = f"{self.log_file}.{LOG_BACKUPS}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(LOG_BACKUPS - 1, 0, -1):
+            path = f"{self.log_file}.{index}"
+            if os.path.exists(path):
+                os.replace(path, f"{self.log_file}.{index + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+
+
+def phase_breakdown(record):
+    """Return [(phase, total seconds, calls)] of a logged run, in first-seen order"""
+    totals = {}
+    for phase in record.get("phases", []):
+        seconds, calls = totals.get(phase["name"], (0.0, 0))
+        totals[phase["name"]] = (seconds + phase["duration_s"], calls + 1)
+    return [(name, seconds, calls) for name, (seconds, calls) in totals.items()]
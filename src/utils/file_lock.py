@@ -0,0 +1,36 @@
+import os
+import contextlib
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on path + ".lock" while the block runs.
+
+    Only other processes (or threads) that take the same lock are kept
+    out; the app, S1SGSM and the CLI all do before touching shared state.
+    """
+    with open(path + ".lock", 'a+b') as lock_file:
+        if os.name == "nt":
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK only retries for about ten seconds
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,77 @@
+import os
+import shutil
+from utils.manifest import iter_files
+from utils.copy_engine import get_copy_engine
+
+STAGING_SUFFIX = ".s1sync-tmp"
+
+# Cloud-synced and FAT filesystems round mtimes to whole (or even) seconds
+MTIME_TOLERANCE_NS = 2 * 10**9
+
+
+def is_unchanged(size, mtime_ns, dst_stat, same_content):
+    """Return True if dst_stat looks like a copy of a file with this size and mtime.
+
+    When the destination only stores whole seconds, an mtime within the
+    tolerance is not proof (a same-size rewrite can land in the same
+    seconds), so same_content() is asked to compare the contents.
+    """
+    if size != dst_stat.st_size:
+        return False
+    if mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    # The destination filesystem may have dropped the sub-second part
+    return (dst_stat.st_mtime_ns % 10**9 == 0
+            and abs(mtime_ns - dst_stat.st_mtime_ns) <= MTIME_TOLERANCE_NS
+            and same_content())
+
+
+def list_destination(dst_dir, folders=None):
+    """Return {rel_path: (path, stat)} for dst_dir (or the given folders in it),
+    removing leftover staged files"""
+    dst_files = {}
+    for rel_path, path, st in iter_files(dst_dir, folders):
+        if rel_path.endswith(STAGING_SUFFIX):
+            # Left over from an interrupted sync
+            os.remove(path)
+            continue
+        dst_files[rel_path] = (path, st)
+    return dst_files
+
+
+def swap_in(copies):
+    """Stage (src_path, dst_path) copies under temporary names, then rename them all into place.
+
+    If any copy fails, the staged files are removed and nothing in the
+    destination has changed. Returns the CopyResult of the copies.
+    """
+    copies = list(copies)
+    for src_path, dst_path in copies:
+        if os.path.isdir(dst_path):
+            # A folder is being replaced by a file of the same name
+            shutil.rmtree(dst_path)
+    result = get_copy_engine().copy_files(
+        (src_path, dst_path + STAGING_SUFFIX) for src_path, dst_path in copies)
+    staged = [dst_path[:-len(STAGING_SUFFIX)] for dst_path in result.copied]
+    if result.errors:
+        for dst_path in staged:
+            try:
+                os.remove(dst_path + STAGING_SUFFIX)
+            except OSError:
+                pass
+        result.raise_errors()
+
+    for dst_path in staged:
+        os.replace(dst_path + STAGING_SUFFIX, dst_path)
+    return result
+
+
+def remove_files(dst_dir, paths):
+    """Delete paths (if present) and prune the folders under dst_dir they leave empty"""
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+    for dirpath, dirnames, filenames in os.walk(dst_dir, topdown=False):
+        if dirpath != dst_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
@@ -0,0 +1,125 @@
+import os
+import hashlib
+import threading
+from utils.copy_engine import get_copy_engine
+from utils.slot_archive import packed_slot_name, extract_slot_archive
+from utils.diagnostics import span, count
+
+
+def git_blob_sha(data):
+    """Return the git object id of a blob with the given contents"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FriendDownloader:
+    """Downloads single save slots from a friend's repo through the GitHub API.
+
+    Only the selected slot's tree is listed and its blobs are fetched in
+    parallel. Every blob is kept in a local cache keyed by its git SHA, so
+    downloading the same or a slightly changed save again only transfers
+    blobs that are not cached yet.
+    """
+
+    def __init__(self, api, cache_dir):
+        self.api = api
+        self.cache_dir = cache_dir
+
+    def list_slots(self, repo):
+        """Return {"<user>/<slot>": slot_ref} for every save slot in the repo.
+
+        slot_ref is {"type": "tree", "sha": ...} for a plain slot folder or
+        {"type": "archive", "sha": ...} for a packed slot archive.
+        """
+        info = self.api.get_json(f"repos/{repo}")
+        branch = info.get("default_branch") or "master"
+        tree = self.api.get_json(f"repos/{repo}/git/trees/{branch}", {"recursive": "1"})
+        if not tree.get("truncated"):
+            entries = [entry for entry in tree["tree"] if entry["path"].count("/") == 1]
+        else:
+            # Too big for one listing: walk the first two levels instead
+            entries = []
+            root = self.api.get_json(f"repos/{repo}/git/trees/{branch}")
+            for user_entry in root["tree"]:
+                if user_entry["type"] != "tree":
+                    continue
+                user_tree = self.api.get_json(f"repos/{repo}/git/trees/{user_entry['sha']}")
+                for entry in user_tree["tree"]:
+                    entries.append(dict(entry, path=f"{user_entry['path']}/{entry['path']}"))
+
+        slots = {}
+        for entry in entries:
+            if entry["type"] == "tree":
+                slots[entry["path"]] = {"type": "tree", "sha": entry["sha"]}
+            elif entry["type"] == "blob" and packed_slot_name(entry["path"]):
+                slots[packed_slot_name(entry["path"])] = {"type": "archive", "sha": entry["sha"]}
+        return slots
+
+    def download_slot(self, repo, slot_ref, dest_dir):
+        """Write the slot described by slot_ref into dest_dir and return transfer stats"""
+        if slot_ref["type"] == "archive":
+            return self._download_archive(repo, slot_ref["sha"], dest_dir)
+
+        with span("list tree"):
+            tree = self.api.get_json(f"repos/{repo}/git/trees/{slot_ref['sha']}", {"recursive": "1"})
+        if tree.get("truncated"):
+            raise Exception("Save slot has too many files to list through the GitHub API")
+        blobs = [entry for entry in tree["tree"] if entry["type"] == "blob"]
+
+        # Fetch the blobs we have not seen before
+        missing = sorted({entry["sha"] for entry in blobs
+                          if not os.path.exists(self._cache_path(entry["sha"]))})
+        with span("fetch blobs"):
+            results, errors = get_copy_engine().run(lambda sha: self._fetch_blob(repo, sha), missing)
+        if errors:
+            sha, error = errors[0]
+            raise Exception(f"Failed to download blob {sha}: {error}")
+
+        # Materialise the slot from the cache
+        with span("write files"):
+            get_copy_engine().copy_files(
+                (self._cache_path(entry["sha"]), os.path.join(dest_dir, *entry["path"].split("/")))
+                for entry in blobs).raise_errors()
+        stats = {
+            "files": len(blobs),
+            "fetched": len(missing),
+            "cached": len({entry["sha"] for entry in blobs}) - len(missing),
+            "bytes": sum(size for _, size in results)
+        }
+        count("blobs_fetched", stats["fetched"])
+        count("blobs_cached", stats["cached"])
+        count("bytes_downloaded", stats["bytes"])
+        return stats
+
+    def _download_archive(self, repo, sha, dest_dir):
+        """Fetch (or reuse) a packed slot archive and unpack it as a stream"""
+        fetched = 0
+        if not os.path.exists(self._cache_path(sha)):
+            with span("fetch archive"):
+                fetched = self._fetch_blob(repo, sha)
+        os.makedirs(dest_dir, exist_ok=True)
+        with span("unpack"), open(self._cache_path(sha), 'rb') as f:
+            files = extract_slot_archive(f, dest_dir)
+        count("blobs_fetched", 1 if fetched else 0)
+        count("blobs_cached", 0 if fetched else 1)
+        count("bytes_downloaded", fetched)
+        return {
+            "files": files,
+            "fetched": 1 if fetched else 0,
+            "cached": 0 if fetched else 1,
+            "bytes": fetched
+        }
+
+    def _fetch_blob(self, repo, sha):
+        data = self.api.get_raw(f"repos/{repo}/git/blobs/{sha}")
+        if git_blob_sha(data) != sha:
+            raise Exception("content does not match its SHA")
+        path = self._cache_path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp_{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _cache_path(self, sha):
+        return os.path.join(self.cache_dir, sha[:2], sha)
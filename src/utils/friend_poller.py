@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from utils.github_api import parse_repo
+
+MAX_POLL_WORKERS = 32
+
+
+class FriendPoller:
+    """Checks every friend repo for its latest commit at the same time.
+
+    Each check is a conditional request carrying the ETag from the previous
+    poll, so repos that did not change answer 304 and cost nothing against
+    the rate limit.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def poll(self, friends, on_result):
+        """Check all friends concurrently.
+
+        on_result(index, result) is called from worker threads as each check
+        finishes. result is a dict with "changed" and, when changed,
+        "last_updated" and "etag"; or "error" if the check failed.
+        """
+        if not friends:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_POLL_WORKERS, len(friends)),
+                                thread_name_prefix="s1sync-poll") as executor:
+            for index, friend in enumerate(friends):
+                executor.submit(self._check, index, dict(friend), on_result)
+
+    def _check(self, index, friend, on_result):
+        try:
+            result = self.check_friend(friend)
+        except Exception as e:
+            result = {"changed": False, "error": str(e)}
+        on_result(index, result)
+
+    def check_friend(self, friend):
+        repo = parse_repo(friend["repo"])
+        commits, etag = self.api.get_json_if_changed(
+            f"repos/{repo}/commits", friend.get("etag"), {"per_page": 1})
+        if commits is None:
+            return {"changed": False}
+        if not commits:
+            return {"changed": True, "last_updated": "Never", "etag": etag}
+        committed = datetime.strptime(commits[0]["commit"]["committer"]["date"], "%Y-%m-%dT%H:%M:%SZ")
+        local_time = committed.replace(tzinfo=timezone.utc).astimezone()
+        return {
+            "changed": True,
+            "last_updated": local_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "etag": etag
+        }
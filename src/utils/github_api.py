@@ -0,0 +1,207 @@
+import time
+import threading
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from utils.diagnostics import count
+
+DEFAULT_API_URL = "https://api.github.com"
+
+# How long cached user/repo lookups stay valid
+CACHE_TTL = 300
+MAX_RETRIES = 3
+# Longest we are willing to sleep for a rate-limit reset before giving up
+MAX_RATE_LIMIT_WAIT = 60
+
+
+def parse_repo(repo_url):
+    """Return "owner/name" from a GitHub URL, SSH remote or owner/name string"""
+    repo = repo_url.strip()
+    if repo.startswith("git@"):
+        repo = repo.split(":", 1)[1]
+    elif "://" in repo:
+        repo = urllib.parse.urlparse(repo).path
+    repo = repo.strip("/")
+    if repo.endswith(".git"):
+        repo = repo[:-len(".git")]
+    parts = repo.split("/")
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        raise Exception(f"Not a GitHub repository: {repo_url}")
+    return f"{parts[0]}/{parts[1]}"
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class GitHubAPI:
+    """GitHub REST client shared by sync, download and the friend poller.
+
+    Requests go through one pooled HTTP session, user/repo lookups are kept
+    in a TTL cache, and rate-limit responses are waited out (up to
+    MAX_RATE_LIMIT_WAIT seconds) instead of failing. api_url can point at any
+    server speaking the same REST paths, e.g. a local stand-in for offline
+    runs. Use get_github_api() rather than creating instances directly.
+    """
+
+    def __init__(self, token="", api_url=DEFAULT_API_URL, timeout=30):
+        self.token = token
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+        self.request_count = 0
+        self.retry_count = 0
+        self._session = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get_json(self, path, params=None, ttl=None):
+        """GET a JSON document; with ttl, reuse a cached answer that is younger"""
+        key = (path, tuple(sorted((params or {}).items())))
+        if ttl:
+            with self._lock:
+                cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+        response = self._request("GET", path, params, "application/vnd.github+json")
+        data = response.json()
+        if ttl:
+            with self._lock:
+                self._cache[key] = (time.monotonic() + ttl, data)
+        return data
+
+    def get_json_if_changed(self, path, etag=None, params=None):
+        """Conditional GET. Returns (data, etag), with data None if unchanged.
+
+        A 304 answer to If-None-Match does not count against the rate limit.
+        """
+        response = self._request("GET", path, params, "application/vnd.github+json", etag=etag)
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), response.headers.get("ETag")
+
+    def get_raw(self, path, params=None):
+        return self._request("GET", path, params, "application/vnd.github.raw").content
+
+    def post_json(self, path, payload):
+        return self._request("POST", path, None, "application/vnd.github+json", payload).json()
+
+    def get_user(self):
+        return self.get_json("user", ttl=CACHE_TTL)
+
+    def get_repo(self, full_name):
+        return self.get_json(f"repos/{full_name}", ttl=CACHE_TTL)
+
+    def create_repo(self, name, description="", private=True):
+        repo = self.post_json("user/repos", {
+            "name": name,
+            "description": description,
+            "private": private
+        })
+        with self._lock:
+            self._cache[(f"repos/{repo['full_name']}", ())] = (time.monotonic() + CACHE_TTL, repo)
+        return repo
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                # Imported on first use to keep startup cheap
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = "ScheduleISaveSync"
+                if self.token:
+                    session.headers["Authorization"] = f"token {self.token}"
+                self._session = session
+            return self._session
+
+    def _request(self, method, path, params, accept, payload=None, etag=None):
+        url = f"{self.api_url}/{path.lstrip('/')}"
+        headers = {"Accept": accept}
+        if etag:
+            headers["If-None-Match"] = etag
+        session = self._get_session()
+
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_for_rate_limit()
+            # Downloads and friend polls send requests from many threads
+            with self._lock:
+                self.request_count += 1
+            count("api_requests")
+            response = session.request(method, url, params=params, json=payload,
+                                       headers=headers, timeout=self.timeout)
+            self._update_rate_limit(response.headers)
+
+            delay = None
+            if response.status_code in (403, 429) and (
+                    "Retry-After" in response.headers
+                    or response.headers.get("X-RateLimit-Remaining") == "0"):
+                delay = self._rate_limit_delay(response.headers)
+            elif response.status_code >= 500:
+                delay = 2 ** attempt
+            if delay is None or attempt == MAX_RETRIES or delay > MAX_RATE_LIMIT_WAIT:
+                break
+            with self._lock:
+                self.retry_count += 1
+            count("api_retries")
+            time.sleep(delay)
+
+        if response.status_code >= 400:
+            message = ""
+            try:
+                message = response.json().get("message", "")
+            except ValueError:
+                pass
+            raise GitHubAPIError(response.status_code,
+                                 f"GitHub API request failed ({response.status_code}): {path} {message}".strip())
+        return response
+
+    def _update_rate_limit(self, headers):
+        if "X-RateLimit-Remaining" in headers:
+            self.rate_limit_remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset" in headers:
+            self.rate_limit_reset = int(headers["X-RateLimit-Reset"])
+
+    def _rate_limit_delay(self, headers):
+        if "Retry-After" in headers:
+            # Either a number of seconds or an HTTP date
+            value = headers["Retry-After"]
+            try:
+                return max(0, int(value))
+            except ValueError:
+                pass
+            try:
+                return max(1, int(parsedate_to_datetime(value).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                return 1
+        return max(1, int(headers.get("X-RateLimit-Reset", time.time())) - int(time.time()))
+
+    def _wait_for_rate_limit(self):
+        """Sleep until the limit resets if the last response said we ran out"""
+        if self.rate_limit_remaining != 0 or not self.rate_limit_reset:
+            return
+        delay = self.rate_limit_reset - time.time()
+        if delay > MAX_RATE_LIMIT_WAIT:
+            raise GitHubAPIError(403, "GitHub API rate limit exceeded; resets at "
+                                 + time.strftime("%H:%M:%S", time.localtime(self.rate_limit_reset)))
+        if delay > 0:
+            time.sleep(delay)
+        self.rate_limit_remaining = None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_github_api(token="", api_url=DEFAULT_API_URL):
+    """Return the process-wide client for this token and API URL"""
+    key = (token, api_url.rstrip("/"))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = GitHubAPI(token, api_url)
+        return _clients[key]
@@ -0,0 +1,133 @@
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """A unit of background work tracked by JobRunner"""
+
+    def __init__(self, job_id, name):
+        self.job_id = job_id
+        self.name = name
+        self.status = "queued"
+        self.message = ""
+        self.fraction = None
+        self.result = None
+        self.error = None
+
+
+class JobRunner:
+    """Runs long operations on worker threads so the Tk mainloop never blocks.
+
+    Workers only ever put events on a thread-safe queue; the queue is drained
+    on the Tk thread through root.after, so every callback (on_progress,
+    on_done, on_error and listeners) runs on the UI thread and may touch
+    widgets directly.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=100):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.jobs = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="s1sync-job")
+        self._events = queue.Queue()
+        self._callbacks = {}
+        self._listeners = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, name, func, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        """Run func(*args, **kwargs) on a worker thread and return its Job.
+
+        If on_progress is given, func is also passed a progress(message,
+        fraction=None) keyword argument it can call from the worker.
+        """
+        job = Job(next(self._ids), name)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._callbacks[job.job_id] = (on_done, on_error, on_progress)
+
+        if on_progress is not None:
+            kwargs["progress"] = lambda message, fraction=None: self._events.put(
+                ("progress", job, (message, fraction)))
+
+        self._events.put(("queued", job, None))
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def run_on_ui(self, func, *args):
+        """Schedule func(*args) on the UI thread; safe to call from any thread"""
+        self._events.put(("call", None, (func, args)))
+
+    def add_listener(self, listener):
+        """Call listener(event, job) on the UI thread for every job event"""
+        self._listeners.append(listener)
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self.jobs.values() if job.status in ("queued", "running")]
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, func, args, kwargs):
+        self._events.put(("started", job, None))
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._events.put(("failed", job, e))
+        else:
+            self._events.put(("done", job, result))
+
+    def _poll(self):
+        try:
+            while True:
+                event, job, payload = self._events.get_nowait()
+                self._dispatch(event, job, payload)
+        except queue.Empty:
+            pass
+        try:
+            self.root.after(self.poll_interval, self._poll)
+        except Exception:
+            # The window was destroyed; stop polling
+            pass
+
+    def _dispatch(self, event, job, payload):
+        if event == "call":
+            func, args = payload
+            func(*args)
+            return
+        on_done, on_error, on_progress = self._callbacks.get(job.job_id, (None, None, None))
+        if event == "started":
+            job.status = "running"
+        elif event == "progress":
+            job.message, job.fraction = payload
+            if on_progress:
+                on_progress(job.message, job.fraction)
+        elif event == "done":
+            job.status = "done"
+            job.result = payload
+        elif event == "failed":
+            job.status = "failed"
+            job.error = payload
+
+        if event in ("done", "failed"):
+            with self._lock:
+                self._callbacks.pop(job.job_id, None)
+                self.jobs.pop(job.job_id, None)
+            try:
+                if event == "done" and on_done:
+                    on_done(payload)
+                elif event == "failed":
+                    if on_error:
+                        on_error(payload)
+                    else:
+                        print(f"Warning: Job '{job.name}' failed: {payload}")
+            except Exception as e:
+                print(f"Warning: Callback for job '{job.name}' failed: {e}")
+
+        for listener in list(self._listeners):
+            listener(event, job)
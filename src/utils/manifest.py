@@ -0,0 +1,175 @@
+import os
+import json
+import hashlib
+from utils.save_compare import hash_save_file, is_volatile_rewrite
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Sibling folders a slot replacement leaves next to the slot. They are
+# never part of a save tree (see iter_files and the catalog);
+# SlotReplacer creates them.
+INCOMING_SUFFIX = ".s1sync-incoming"
+PREVIOUS_SUFFIX = ".s1sync-previous"
+SWAP_SUFFIX = ".s1sync-swap"
+REPLACE_SUFFIXES = (INCOMING_SUFFIX, PREVIOUS_SUFFIX, SWAP_SUFFIX)
+
+
+def is_replace_artifact(name):
+    """Return True for the staging/previous folders kept beside a slot"""
+    return name.endswith(REPLACE_SUFFIXES)
+
+
+def hash_file(path):
+    """Return the SHA-1 hex digest of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def slot_key(rel_path):
+    """Return the "<user>/<slot>" part of a manifest path"""
+    return "/".join(rel_path.split("/")[:2])
+
+
+def iter_files(root, folders=None):
+    """Yield (rel_path, path, stat) for every file under root, in sorted order.
+
+    rel_path is POSIX-style and relative to root. If folders is given only
+    those subfolders of root are walked. Folders left beside a slot by a
+    slot replacement are skipped.
+    """
+    tops = [root] if folders is None else [os.path.join(root, f) for f in sorted(folders)
+                                           if not is_replace_artifact(f)]
+    for top in tops:
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if not is_replace_artifact(d))
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+                yield rel_path, path, os.stat(path)
+
+
+def is_unchanged_entry(entry, st):
+    """Return True if a file with stat st still matches a manifest entry.
+
+    Besides the entry's own size and mtime this accepts the local file an
+    entry was kept for after a volatile-only rewrite ("local").
+    """
+    return entry is not None and (
+        entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+        or entry.get("local") == [st.st_size, st.st_mtime_ns])
+
+
+def scan_tree(root, previous=None, folders=None, volatile_keys=None, ignored=None):
+    """Return manifest entries for root, reusing hashes from previous entries
+    whose size and mtime are unchanged.
+
+    With volatile_keys, JSON files also get a semantic hash ("sem", see
+    save_compare). A file rewritten with only volatile keys changed keeps
+    its previous entry, so it is not seen as changed, and its path is
+    appended to ignored. The entry remembers the rewritten file's size and
+    mtime, so the file is not hashed (or reported) again until it changes.
+    """
+    previous = previous or {}
+    entries = {}
+    for rel_path, path, st in iter_files(root, folders):
+        entry = previous.get(rel_path)
+        if is_unchanged_entry(entry, st):
+            entries[rel_path] = entry
+            continue
+        sha1, semantic = hash_save_file(path, volatile_keys)
+        if is_volatile_rewrite(entry, sha1, semantic):
+            # Keep describing the version that was synced; its size and
+            # mtime are what the target has
+            entries[rel_path] = dict(entry, local=[st.st_size, st.st_mtime_ns])
+            if ignored is not None:
+                ignored.append(rel_path)
+            continue
+        entries[rel_path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha1": sha1
+        }
+        if semantic:
+            entries[rel_path]["sem"] = semantic
+    return entries
+
+
+def refresh_kept_entries(root, entries, prefix, volatile_keys=None):
+    """Re-describe the files under prefix that kept their entry after a
+    volatile-only rewrite as they are now on disk.
+
+    Used when such a file is written to the target after all (e.g. its
+    slot is repacked), so the entry matches what the target holds.
+    """
+    for rel_path, entry in entries.items():
+        if "local" in entry and rel_path.startswith(prefix):
+            path = os.path.join(root, *rel_path.split("/"))
+            st = os.stat(path)
+            sha1, semantic = hash_save_file(path, volatile_keys)
+            entries[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1}
+            if semantic:
+                entries[rel_path]["sem"] = semantic
+
+
+class SaveManifest:
+    """Content-hash manifest of the save directory, persisted between runs.
+
+    Entries map a POSIX-style path relative to the save directory
+    ("<user>/<slot>/<file>") to its size, mtime and SHA-1. A file is only
+    re-hashed when its size or mtime changed since the last scan. With
+    volatile_keys, rewrites that only touch those JSON keys are not
+    changes; the last scan lists them in ignored.
+    """
+
+    def __init__(self, manifest_file, target="", volatile_keys=None):
+        self.manifest_file = manifest_file
+        self.target = target
+        self.volatile_keys = volatile_keys
+        self.ignored = []
+        self.entries = self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read manifest {self.manifest_file}: {e}")
+            return {}
+        if data.get("version") != MANIFEST_VERSION or data.get("target") != self.target:
+            return {}
+        return data.get("files", {})
+
+    def save(self, entries=None):
+        if entries is not None:
+            self.entries = entries
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "target": self.target,
+                "files": self.entries
+            }, f)
+        os.replace(tmp_file, self.manifest_file)
+
+    def reset(self):
+        self.entries = {}
+
+    def scan(self, root, folders=None):
+        """Scan root (or just the given folders under it) and return fresh entries"""
+        self.ignored = []
+        return scan_tree(root, self.entries, folders, self.volatile_keys, self.ignored)
+
+    def diff(self, new_entries):
+        """Return (changed, removed) paths between the stored and new entries"""
+        changed = [path for path, entry in new_entries.items()
+                   if path not in self.entries or self.entries[path]["sha1"] != entry["sha1"]]
+        removed = [path for path in self.entries if path not in new_entries]
+        return sorted(changed), sorted(removed)
+
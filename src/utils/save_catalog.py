@@ -0,0 +1,227 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from utils.manifest import iter_files, hash_file, is_replace_artifact
+
+# How many folder levels each kind of tree has; the last level is the slot
+# (see summary). save: <user>/<slot>, friend: <friend>/<user>/<slot>
+KIND_DEPTHS = {"save": 2, "friend": 3}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER,
+    file_count INTEGER,
+    hash TEXT,
+    stats TEXT,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS backups (
+    backup_id TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    created TEXT,
+    size INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backup_objects (
+    backup_id TEXT NOT NULL,
+    sha1 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (backup_id, sha1)
+);
+CREATE INDEX IF NOT EXISTS backup_objects_sha1 ON backup_objects (sha1);
+"""
+
+# Bumped when indexed data has to be rebuilt
+SCHEMA_VERSION = 2
+
+
+class SaveCatalog:
+    """SQLite index of save folders, slots, friend copies and backups.
+
+    refresh() stats every indexed directory but only lists those whose
+    mtime changed since the last refresh, so UI pickers and sync planning
+    can query the index instead of walking the disk again. It never reads
+    files, so it is cheap enough for the UI thread. Slot sizes and hashes
+    are computed by summary() when asked for and kept with a digest of the
+    slot's file stats, so a slot is only hashed again once one of its
+    files changed.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Backups indexed before backup_objects existed are read again,
+            # and folders indexed before summaries kept their file stats
+            with self._conn:
+                self._conn.execute("DROP TABLE IF EXISTS backups")
+                self._conn.execute("DROP TABLE IF EXISTS dirs")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def refresh(self, root, kind="save"):
+        """Bring the index for root up to date"""
+        root = os.path.normpath(root)
+        with self._lock, self._conn:
+            self._refresh_dir(root, None, kind, 0, KIND_DEPTHS[kind])
+
+    def children(self, path):
+        """Return the names of the indexed sub-folders of path, sorted"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM dirs WHERE parent = ? ORDER BY name",
+                                      (os.path.normpath(path),)).fetchall()
+        return [row["name"] for row in rows]
+
+    def get(self, path):
+        """Return the index row for a folder as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM dirs WHERE path = ?",
+                                     (os.path.normpath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def summary(self, path):
+        """Return (size, file count, content hash) of an indexed slot folder.
+
+        Every file in the slot is stat'ed; the slot is hashed again only if
+        a file was added, removed or changed size or mtime since it was last
+        summarised. That reads every file in it, so call this off the UI
+        thread.
+        """
+        path = os.path.normpath(path)
+        row = self.get(path)
+        if row is None:
+            return None
+        files = list(iter_files(path))
+        stats = hashlib.sha1("".join(f"{rel_path}:{st.st_size}:{st.st_mtime_ns}\n"
+                                     for rel_path, _, st in files).encode("utf-8")).hexdigest()
+        if row["hash"] is not None and row["stats"] == stats:
+            return row["size"], row["file_count"], row["hash"]
+
+        digest = hashlib.sha1()
+        for rel_path, file_path, _ in files:
+            digest.update(f"{rel_path}:{hash_file(file_path)}\n".encode("utf-8"))
+        size = sum(st.st_size for _, _, st in files)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE dirs SET size = ?, file_count = ?, hash = ?, stats = ? WHERE path = ?",
+                               (size, len(files), digest.hexdigest(), stats, path))
+        return size, len(files), digest.hexdigest()
+
+    def refresh_backups(self, backup_store):
+        """Index new backup manifests and forget deleted ones"""
+        backup_ids = backup_store.list_backups()
+        with self._lock, self._conn:
+            known = {row["backup_id"] for row in self._conn.execute(
+                "SELECT backup_id FROM backups WHERE root = ?", (backup_store.root,))}
+            for backup_id in known - set(backup_ids):
+                self._conn.execute("DELETE FROM backups WHERE backup_id = ?", (backup_id,))
+                self._conn.execute("DELETE FROM backup_objects WHERE backup_id = ?", (backup_id,))
+            for backup_id in backup_ids:
+                if backup_id in known:
+                    continue
+                # Backup manifests never change, so each is read only once
+                backup = backup_store.load_backup(backup_id)
+                manifest_path = os.path.join(backup_store.root, f"{backup_id}.json")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO backups VALUES (?, ?, ?, ?, ?, ?)",
+                    (backup_id, backup_store.root, backup.get("created"),
+                     sum(entry["size"] for entry in backup["files"].values()),
+                     len(backup["files"]), os.stat(manifest_path).st_mtime_ns))
+                self._conn.execute("DELETE FROM backup_objects WHERE backup_id = ?", (backup_id,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO backup_objects VALUES (?, ?, ?)",
+                    [(backup_id, entry["sha1"], entry["size"]) for entry in backup["files"].values()])
+
+    def backups(self, root):
+        """Return indexed backups under root as dicts, oldest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM backups WHERE root = ? ORDER BY backup_id",
+                                      (root,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def backup_bytes(self, backup_ids):
+        """Return the bytes the store needs for these backups, counting shared files once"""
+        backup_ids = list(backup_ids)
+        if not backup_ids:
+            return 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT SUM(size) FROM (SELECT DISTINCT sha1, size FROM backup_objects "
+                f"WHERE backup_id IN ({', '.join('?' * len(backup_ids))}))", backup_ids).fetchone()
+        return row[0] or 0
+
+    def orphaned_objects(self, backup_ids):
+        """Return {sha1: size} of objects used only by the given backups"""
+        backup_ids = list(backup_ids)
+        if not backup_ids:
+            return {}
+        marks = ", ".join("?" * len(backup_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT sha1, size FROM backup_objects WHERE backup_id IN ({marks}) "
+                f"AND sha1 NOT IN (SELECT sha1 FROM backup_objects WHERE backup_id NOT IN ({marks}))",
+                backup_ids + backup_ids).fetchall()
+        return {row["sha1"]: row["size"] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _refresh_dir(self, path, parent, kind, level, depth):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._forget(path)
+            return
+
+        row = self._conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row and row["mtime_ns"] == st.st_mtime_ns:
+            children = [r["path"] for r in self._conn.execute(
+                "SELECT path FROM dirs WHERE parent = ?", (path,))]
+        else:
+            children = []
+            if level < depth:
+                with os.scandir(path) as it:
+                    children = [entry.path for entry in it
+                                if entry.is_dir() and not is_replace_artifact(entry.name)]
+                known = {r["path"] for r in self._conn.execute(
+                    "SELECT path FROM dirs WHERE parent = ?", (path,))}
+                for gone in known - set(children):
+                    self._forget(gone)
+
+            # A summary is kept; summary() checks it against the file stats
+            self._conn.execute(
+                "INSERT INTO dirs (path, parent, name, kind, mtime_ns, scanned_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns, scanned_at = excluded.scanned_at",
+                (path, parent, os.path.basename(path), kind, st.st_mtime_ns, time.time()))
+
+        for child in children:
+            self._refresh_dir(child, path, kind, level + 1, depth)
+
+    def _forget(self, path):
+        """Drop a folder and everything below it from the index"""
+        prefix = path + os.sep
+        self._conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                           (path, len(prefix), prefix))
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(config_dir):
+    """Return the process-wide catalog stored in config_dir"""
+    with _catalogs_lock:
+        if config_dir not in _catalogs:
+            _catalogs[config_dir] = SaveCatalog(os.path.join(config_dir, "catalog.db"))
+        return _catalogs[config_dir]
@@ -0,0 +1,84 @@
+import json
+import hashlib
+
+# Keys Schedule I rewrites on every save even when nothing happened in the
+# game: the save's last played date and version in Metadata.json and the
+# play-time counter in Time.json. Matched by name at any depth.
+DEFAULT_VOLATILE_KEYS = ["LastPlayedDate", "LastSaveVersion", "Playtime"]
+
+
+def _strip_keys(value, volatile_keys):
+    if isinstance(value, dict):
+        return {key: _strip_keys(item, volatile_keys) for key, item in value.items()
+                if key not in volatile_keys}
+    if isinstance(value, list):
+        return [_strip_keys(item, volatile_keys) for item in value]
+    return value
+
+
+def canonical_json(data, volatile_keys=()):
+    """Return data as compact JSON with sorted keys and without volatile keys"""
+    return json.dumps(_strip_keys(data, set(volatile_keys)), sort_keys=True,
+                      separators=(",", ":"), ensure_ascii=False)
+
+
+def hash_save_file(path, volatile_keys=None):
+    """Return (SHA-1 of the bytes, semantic hash) of a save file.
+
+    The semantic hash covers the canonical form of a JSON file without
+    volatile_keys, so two versions that only differ in those keys,
+    whitespace or key order hash the same. It is None for files that are
+    not JSON or when no volatile keys are configured.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    sha1 = hashlib.sha1(data).hexdigest()
+    if not volatile_keys or not path.lower().endswith(".json"):
+        return sha1, None
+    try:
+        document = json.loads(data.decode("utf-8-sig"))
+    except (ValueError, UnicodeDecodeError):
+        return sha1, None
+    # The key set is part of the hash, so changing it never matches old hashes
+    digest = hashlib.sha1("\n".join(sorted(volatile_keys)).encode("utf-8") + b"\0")
+    digest.update(canonical_json(document, volatile_keys).encode("utf-8"))
+    return sha1, digest.hexdigest()
+
+
+def is_volatile_rewrite(entry, sha1, semantic):
+    """Return True if a file hashed to (sha1, semantic) only differs from a
+    manifest entry in volatile keys"""
+    return (entry is not None and semantic is not None and entry.get("sem") == semantic
+            and entry["sha1"] != sha1)
+
+
+def summarize_changes(changed, removed, ignored=()):
+    """Count changed, removed and volatile-only paths per "<user>/<slot>"
+
+    Files directly in a user folder are counted under the user folder.
+    """
+    summary = {}
+    for kind, paths in (("changed", changed), ("removed", removed), ("ignored", ignored)):
+        for rel_path in paths:
+            key = "/".join(rel_path.split("/")[:2 if rel_path.count("/") >= 2 else 1])
+            counts = summary.setdefault(key, {"changed": 0, "removed": 0, "ignored": 0})
+            counts[kind] += 1
+    return summary
+
+
+def describe_changes(summary, limit=3):
+    """Return a one-line "what changed" text for summarize_changes output"""
+    parts = []
+    ignored = 0
+    for key in sorted(summary):
+        counts = summary[key]
+        ignored += counts["ignored"]
+        details = [f"{counts[kind]} {kind}" for kind in ("changed", "removed") if counts[kind]]
+        if details:
+            parts.append(f"{key.split('/')[-1]}: {', '.join(details)}")
+    text = "; ".join(parts[:limit]) if parts else "No changes"
+    if len(parts) > limit:
+        text += f" (+{len(parts) - limit} more)"
+    if ignored:
+        text += f"; {ignored} timestamp-only rewrite{'s' if ignored != 1 else ''} skipped"
+    return text
@@ -1,27 +1,141 @@
 import os
 import shutil
-from datetime import datetime
+from utils.manifest import slot_key, is_replace_artifact
+from utils.backup_store import BackupStore
+from utils.save_catalog import get_catalog
+from utils.slot_replace import SlotReplacer
+from utils.backup_retention import prune_backups
+from utils.diagnostics import trace_run, span
 
 class SaveManager:
     def __init__(self, config_manager):
         self.config_manager = config_manager
+        self.backup_store = BackupStore(os.path.join(self.config_manager.config_dir, "backups"))
+        self.catalog = get_catalog(self.config_manager.config_dir)
+        self.slot_replacer = SlotReplacer(self.config_manager.config_dir)
 
     def create_backup(self):
-        """Create a local backup of save files"""
+        """Create a local backup of save files, then thin out old backups"""
         if not os.path.exists(self.config_manager.config["save_dir"]):
             raise Exception(f"Save directory not found: {self.config_manager.config['save_dir']}")
         
-        backup_dir = os.path.join(
-            self.config_manager.config_dir, 
-            "backups",
-            f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        )
+        # Picked up per backup, so a change in Settings applies right away
+        self.backup_store.volatile_keys = self.config_manager.config["volatile_json_keys"]
+        with trace_run("backup", self.config_manager.config_dir):
+            backup_path = self.backup_store.create_backup(self.config_manager.config["save_dir"])
+            try:
+                with span("prune"):
+                    self.prune_backups()
+            except Exception as e:
+                # The backup itself succeeded; pruning is retried after the next one
+                print(f"Warning: Could not prune old backups: {e}")
+        return backup_path
+
+    def prune_backups(self):
+        """Apply the backup retention policy. Returns (backups deleted, bytes freed)"""
+        return prune_backups(self.backup_store, self.catalog, 
+                             self.config_manager.config["backup_budget_mb"])
+
+    def gc_backups(self):
+        """Remove backup objects that no backup refers to any more"""
+        return self.backup_store.gc()
+
+    def restore_backup(self, backup_id, dest_dir=None):
+        """Write a backup into dest_dir, or make the save directory match it.
+
+        The save directory is backed up first. Each slot of the backup is
+        rebuilt beside the live one and swapped in by the SlotReplacer;
+        slots and loose files the backup does not have are removed.
+        """
+        if dest_dir:
+            return self.backup_store.restore(backup_id, dest_dir)
+
+        save_dir = self.config_manager.config["save_dir"]
+        with trace_run("restore", self.config_manager.config_dir):
+            files = self.backup_store.load_backup(backup_id)["files"]
+            if os.path.exists(save_dir):
+                with span("safety backup"):
+                    self.backup_store.volatile_keys = self.config_manager.config["volatile_json_keys"]
+                    self.backup_store.create_backup(save_dir)
+
+            slots = {}
+            loose = []
+            for rel_path in files:
+                if rel_path.count("/") >= 2:
+                    slots.setdefault(slot_key(rel_path), []).append(rel_path)
+                else:
+                    loose.append(rel_path)
+            for slot, paths in sorted(slots.items()):
+                self.slot_replacer.install(
+                    os.path.join(save_dir, *slot.split("/")),
+                    lambda staging_dir, slot=slot, paths=paths: self.backup_store.restore(
+                        backup_id, staging_dir, paths, slot + "/"))
+            self.backup_store.restore(backup_id, save_dir, loose)
+
+            with span("remove"):
+                for rel_path, path, is_dir in self._save_tree_items(save_dir):
+                    if rel_path in slots or rel_path in files:
+                        continue
+                    if is_dir:
+                        if not any(key.startswith(rel_path + "/") for key in files):
+                            shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+        return save_dir
+
+    def _save_tree_items(self, save_dir):
+        """Yield (rel_path, path, is_dir) for the user folders, slots and
+        loose files of the save directory"""
+        for user_folder in sorted(os.listdir(save_dir)):
+            user_path = os.path.join(save_dir, user_folder)
+            if not os.path.isdir(user_path):
+                yield user_folder, user_path, False
+                continue
+            for name in sorted(os.listdir(user_path)):
+                if is_replace_artifact(name):
+                    continue
+                path = os.path.join(user_path, name)
+                yield f"{user_folder}/{name}", path, os.path.isdir(path)
+            yield user_folder, user_path, True
+
+    def list_backups(self):
+        """Get indexed backups (id, created, size, file_count), oldest first"""
+        self.catalog.refresh_backups(self.backup_store)
+        return self.catalog.backups(self.backup_store.root)
+
+    def install_save(self, target_dir, fill):
+        """Write a slot with fill(staging_dir) and swap it in place of target_dir"""
+        with trace_run("download", self.config_manager.config_dir):
+            return self.slot_replacer.install(target_dir, fill)
+
+    def last_replace(self):
+        """Get the last installed slot that can be undone, or None"""
+        return self.slot_replacer.last_replace()
+
+    def undo_last_replace(self):
+        """Swap the last installed slot with the save it replaced"""
+        return self.slot_replacer.undo_last()
+
+    def get_user_folders(self):
+        """Get list of Steam user ID folders in the save directory"""
+        save_dir = self.config_manager.config["save_dir"]
+        if not os.path.exists(save_dir):
+            return []
         
-        if not os.path.exists(os.path.dirname(backup_dir)):
-            os.makedirs(os.path.dirname(backup_dir))
+        self.catalog.refresh(save_dir)
+        return self.catalog.children(save_dir)
+
+    def get_next_save_slot(self, user_folder):
+        """Get the first unused SaveGame_<n> name in a user folder"""
+        save_numbers = []
+        for save in self.get_save_games(user_folder):
+            if save.startswith("SaveGame_"):
+                try:
+                    save_numbers.append(int(save.split("_")[1]))
+                except ValueError:
+                    pass
         
-        shutil.copytree(self.config_manager.config["save_dir"], backup_dir)
-        return backup_dir
+        return f"SaveGame_{max(save_numbers) + 1 if save_numbers else 1}"
 
     def get_save_games(self, user_folder):
         """Get list of save games for a specific user folder"""
@@ -29,5 +143,10 @@ class SaveManager:
         if not os.path.exists(user_dir):
             return []
         
-        return [f for f in os.listdir(user_dir) 
-                if os.path.isdir(os.path.join(user_dir, f))] 
\ No newline at end of file
+        self.catalog.refresh(self.config_manager.config["save_dir"])
+        return self.catalog.children(user_dir)
+
+    def get_save_summary(self, user_folder, save_name):
+        """Get the size, file count and content hash of a save; changed saves are hashed"""
+        summary = self.catalog.summary(os.path.join(self.config_manager.config["save_dir"], user_folder, save_name))
+        return dict(zip(("size", "file_count", "hash"), summary)) if summary else None
@@ -0,0 +1,71 @@
+import os
+import time
+import threading
+
+
+class SaveWatcher:
+    """Watches the save directory and reports once the game has finished writing.
+
+    A background thread stat-scans the tree every poll_interval seconds and
+    compares a cheap (path, size, mtime) snapshot. When the snapshot changes
+    the watcher waits until it has been stable for settle_delay seconds and
+    then calls on_settled() once, so a burst of autosaves collapses into a
+    single sync. on_settled runs on the watcher thread.
+    """
+
+    def __init__(self, save_dir, on_settled, poll_interval=5.0, settle_delay=30.0):
+        self.save_dir = save_dir
+        self.on_settled = on_settled
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="s1sync-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        last_snapshot = self._snapshot()
+        last_change = None
+        while not self._stop_event.wait(self.poll_interval):
+            snapshot = self._snapshot()
+            if snapshot != last_snapshot:
+                last_snapshot = snapshot
+                last_change = time.monotonic()
+            elif last_change is not None and time.monotonic() - last_change >= self.settle_delay:
+                last_change = None
+                try:
+                    self.on_settled()
+                except Exception as e:
+                    print(f"Warning: Auto-sync callback failed: {e}")
+
+    def _snapshot(self):
+        """Return a hashable summary of every file's size and mtime"""
+        entries = []
+        stack = [self.save_dir]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            entries.append((entry.path, st.st_size, st.st_mtime_ns))
+            except OSError:
+                # Directory vanished mid-scan (or the save dir is missing)
+                continue
+        return hash(frozenset(entries))
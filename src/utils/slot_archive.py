@@ -0,0 +1,78 @@
+import os
+import json
+import lzma
+import shutil
+import tarfile
+import threading
+
+ARCHIVE_SUFFIX = ".tar.xz"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def archive_paths(slot):
+    """Return the repo paths of a packed slot's archive and manifest"""
+    return f"{slot}{ARCHIVE_SUFFIX}", f"{slot}{MANIFEST_SUFFIX}"
+
+
+def packed_slot_name(path):
+    """Return "<user>/<slot>" if path is a packed slot archive, else None"""
+    if path.endswith(ARCHIVE_SUFFIX) and path.count("/") == 1:
+        return path[:-len(ARCHIVE_SUFFIX)]
+    return None
+
+
+def build_slot_archive(save_dir, slot, entries, dest_dir):
+    """Pack one slot into <dest_dir>/<slot>.tar.xz plus a small JSON manifest.
+
+    entries are the sync manifest entries of the slot's files. The archive
+    is deterministic (sorted members, zeroed owners and times), so a slot
+    whose contents did not change packs to identical bytes and git sees no
+    change. Returns the two repo-relative paths written.
+    """
+    prefix = slot + "/"
+    files = sorted(path for path in entries if path.startswith(prefix))
+    archive_path, manifest_path = archive_paths(slot)
+    archive_file = os.path.join(dest_dir, *archive_path.split("/"))
+    os.makedirs(os.path.dirname(archive_file), exist_ok=True)
+
+    tmp_file = f"{archive_file}.tmp_{threading.get_ident()}"
+    with lzma.open(tmp_file, "wb", preset=6) as xz_f:
+        with tarfile.open(fileobj=xz_f, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            for path in files:
+                with open(os.path.join(save_dir, *path.split("/")), "rb") as f:
+                    info = tarfile.TarInfo(path[len(prefix):])
+                    # The file we read, not the manifest, decides how much is packed
+                    info.size = os.fstat(f.fileno()).st_size
+                    info.mode = 0o644
+                    info.mtime = 0
+                    tar.addfile(info, f)
+    os.replace(tmp_file, archive_file)
+
+    with open(os.path.join(dest_dir, *manifest_path.split("/")), "w") as f:
+        json.dump({
+            "slot": slot,
+            "files": {path[len(prefix):]: {"size": entries[path]["size"], "sha1": entries[path]["sha1"]}
+                      for path in files}
+        }, f, indent=1, sort_keys=True)
+    return [archive_path, manifest_path]
+
+
+def extract_slot_archive(fileobj, dest_dir):
+    """Unpack a slot archive from a readable stream into dest_dir"""
+    dest_root = os.path.realpath(dest_dir)
+    count = 0
+    with tarfile.open(fileobj=fileobj, mode="r|xz") as tar:
+        for member in tar:
+            target = os.path.realpath(os.path.join(dest_root, member.name))
+            if not target.startswith(dest_root + os.sep):
+                raise Exception(f"Unsafe path in save archive: {member.name}")
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            if not member.isfile():
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with tar.extractfile(member) as src_f, open(target, "wb") as dst_f:
+                shutil.copyfileobj(src_f, dst_f, 1024 * 1024)
+            count += 1
+    return count
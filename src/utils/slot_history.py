@@ -0,0 +1,67 @@
+import json
+from utils.github_api import GitHubAPIError
+
+# Kept in the save repo next to the user folders; never part of a save tree
+HISTORY_DIR = ".s1sync"
+HISTORY_PATH = f"{HISTORY_DIR}/slot_history.json"
+# Versions listed per slot; older ones stay in the git history
+HISTORY_LIMIT = 200
+
+
+def is_history_path(rel_path):
+    return rel_path.split("/", 1)[0] == HISTORY_DIR
+
+
+class SlotHistory:
+    """Index of the versions of every save slot pushed to a repo.
+
+    Maps "<user>/<slot>" to a list of versions, oldest first. A version is
+    {"time", "type", "sha"}, where type and sha form the slot_ref that
+    FriendDownloader.download_slot takes: the slot's git tree, or its
+    archive blob when packed. Restoring a version therefore only fetches
+    that slot's objects. A version is added whenever a sync changes the
+    slot, and the index is committed together with the change.
+    """
+
+    def __init__(self, slots=None):
+        self.slots = slots or {}
+
+    @classmethod
+    def from_json(cls, data):
+        if not data:
+            return cls()
+        try:
+            document = json.loads(data)
+        except ValueError as e:
+            print(f"Warning: Could not read slot history: {e}")
+            return cls()
+        return cls(document.get("slots", {}))
+
+    def to_json(self):
+        return json.dumps({"version": 1, "slots": self.slots}, indent=1, sort_keys=True) + "\n"
+
+    def record(self, slot, slot_ref, when):
+        """Add a version of slot unless it is the latest one. Returns True if added."""
+        versions = self.slots.setdefault(slot, [])
+        if versions and versions[-1]["sha"] == slot_ref["sha"]:
+            return False
+        versions.append({"time": when, "type": slot_ref["type"], "sha": slot_ref["sha"]})
+        del versions[:-HISTORY_LIMIT]
+        return True
+
+    def slot_names(self):
+        return sorted(self.slots)
+
+    def versions(self, slot):
+        """Return the versions of slot, newest first"""
+        return list(reversed(self.slots.get(slot, [])))
+
+
+def fetch_slot_history(api, repo):
+    """Read the history index of a GitHub repo with one contents API call"""
+    try:
+        return SlotHistory.from_json(api.get_raw(f"repos/{repo}/contents/{HISTORY_PATH}"))
+    except GitHubAPIError as e:
+        if e.status == 404:
+            return SlotHistory()
+        raise
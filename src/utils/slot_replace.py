@@ -0,0 +1,116 @@
+import os
+import json
+import shutil
+from datetime import datetime
+from utils.diagnostics import span
+from utils.manifest import INCOMING_SUFFIX, PREVIOUS_SUFFIX, SWAP_SUFFIX
+
+
+class SlotReplacer:
+    """Installs save slots by renaming, so a failed install never touches the slot.
+
+    The new slot is written to "<slot>.s1sync-incoming" next to the target,
+    the current slot is renamed to "<slot>.s1sync-previous" and the new one
+    renamed into place. Undoing the last replace swaps the two folders back,
+    which is a couple of renames however big the save is. Only the last
+    replaced copy of each slot is kept.
+    """
+
+    def __init__(self, config_dir):
+        self.state_file = os.path.join(config_dir, "last_replace.json")
+
+    def install(self, target_dir, fill):
+        """Call fill(staging_dir) to write the new slot, then swap it in.
+
+        Returns whatever fill returned. If fill or the swap fails, the
+        existing slot is left as it was.
+        """
+        incoming = target_dir + INCOMING_SUFFIX
+        previous = target_dir + PREVIOUS_SUFFIX
+        if os.path.exists(incoming):
+            # Left over from an interrupted install
+            shutil.rmtree(incoming)
+        os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+
+        try:
+            with span("fill"):
+                result = fill(incoming)
+            if not os.path.isdir(incoming):
+                os.makedirs(incoming)
+        except Exception:
+            shutil.rmtree(incoming, ignore_errors=True)
+            raise
+
+        with span("swap"):
+            if os.path.exists(previous):
+                shutil.rmtree(previous)
+            replaced = os.path.exists(target_dir)
+            if replaced:
+                os.rename(target_dir, previous)
+            try:
+                os.rename(incoming, target_dir)
+            except OSError:
+                if replaced:
+                    os.rename(previous, target_dir)
+                raise
+
+        self._save_state({
+            "target": target_dir,
+            "replaced": replaced,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "undone": False
+        })
+        return result
+
+    def last_replace(self):
+        """Return the state of the last install ({"target", "replaced", "time", "undone"}) or None"""
+        if not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read {self.state_file}: {e}")
+            return None
+        target = state["target"]
+        if not os.path.exists(target) and not os.path.exists(target + PREVIOUS_SUFFIX):
+            return None
+        return state
+
+    def undo_last(self):
+        """Swap the last installed slot with the one it replaced.
+
+        Calling it again redoes the install. Returns the updated state.
+        """
+        state = self.last_replace()
+        if state is None:
+            raise Exception("There is no replaced save to restore")
+
+        target = state["target"]
+        previous = target + PREVIOUS_SUFFIX
+        swap = target + SWAP_SUFFIX
+        if os.path.exists(swap):
+            shutil.rmtree(swap)
+
+        moved = []
+        try:
+            for src, dst in ((target, swap), (previous, target), (swap, previous)):
+                if os.path.exists(src):
+                    os.rename(src, dst)
+                    moved.append((src, dst))
+        except OSError:
+            # e.g. the game holds a file open; put everything back
+            for src, dst in reversed(moved):
+                os.rename(dst, src)
+            raise
+
+        state["undone"] = not state["undone"]
+        self._save_state(state)
+        return state
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_file, self.state_file)
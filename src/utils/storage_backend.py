@@ -0,0 +1,546 @@
+import os
+import shutil
+import hashlib
+import subprocess
+from datetime import datetime
+from utils.manifest import SaveManifest, slot_key, hash_file, refresh_kept_entries
+from utils.save_compare import hash_save_file, is_volatile_rewrite
+from utils.slot_archive import archive_paths, build_slot_archive
+from utils.slot_history import SlotHistory, HISTORY_PATH, is_history_path
+from utils.copy_engine import get_copy_engine
+from utils.folder_sync import is_unchanged, list_destination, swap_in, remove_files
+from utils.github_api import GitHubAPIError
+from utils.transfer_journal import TransferJournal
+from utils.diagnostics import span, count
+
+
+def backend_state_path(config_dir, kind, target):
+    """Return a per-target file or folder name under config_dir/<kind>"""
+    return os.path.join(config_dir, kind, hashlib.sha1(target.encode("utf-8")).hexdigest()[:16])
+
+
+class StorageBackend:
+    """Somewhere a save tree is synced to.
+
+    sync() is the same for every backend: the source is hashed with a
+    SaveManifest kept per target, only paths that changed since the last
+    successful sync are handed to write(), and transfers go through the
+    shared copy engine. Subclasses fill in where the files end up.
+
+    Writes are split into chunks of at most chunk_files files or
+    chunk_bytes bytes. Each finished chunk is checkpointed in a transfer
+    journal next to the manifest, so a sync that is interrupted (sleep,
+    lost network, a locked file) resumes where it stopped.
+
+    With volatile_keys, JSON save files that were only rewritten with new
+    values for those keys (see save_compare) are not synced at all.
+    """
+
+    chunk_files = 1000
+    chunk_bytes = 32 * 1024 * 1024
+
+    def __init__(self, manifest_file, target, volatile_keys=None):
+        self.manifest_file = manifest_file
+        self.target = target
+        self.volatile_keys = volatile_keys
+        self.journal = TransferJournal(manifest_file + ".journal", target)
+
+    def sync(self, src_dir, folders=None):
+        """Bring the target up to date with src_dir (or the given folders in it).
+
+        Returns a dict with the changed and removed source paths, the paths
+        skipped because only volatile keys changed ("ignored") and the bytes
+        written.
+        """
+        manifest = SaveManifest(self.manifest_file, target=self.target, volatile_keys=self.volatile_keys)
+        if not self.has_state():
+            manifest.reset()
+        done = self.journal.load()
+        if not done:
+            # Missing, or left by a sync to another target
+            self.journal.clear()
+
+        with span("scan"):
+            entries = manifest.scan(src_dir, folders)
+            changed, removed = manifest.diff(entries)
+        with span("check"):
+            out_of_date, stale = self.check(entries)
+        changed = sorted(set(changed) | set(out_of_date))
+
+        written = 0
+        if changed or removed or stale:
+            with span("open"):
+                moved = self.open()
+            if moved:
+                # Whatever an interrupted sync wrote may have been replaced
+                self.journal.clear()
+                done = {}
+            if moved or not manifest.entries:
+                # The target no longer matches the manifest, so compare everything
+                with span("compare"):
+                    changed = self.compare(entries)
+                    stale = sorted(set(self.list_paths()) - self.target_paths(entries))
+            # Skip files an interrupted sync to this target already transferred
+            pending = [path for path in changed if done.get(path) != entries[path]["sha1"]]
+            with span("write"):
+                written = self.write(src_dir, entries, pending, removed, stale)
+
+        with span("save manifest"):
+            manifest.save(entries)
+        self.journal.clear()
+        count("files_scanned", len(entries))
+        count("files_changed", len(changed))
+        count("files_removed", len(removed))
+        count("files_ignored", len(manifest.ignored))
+        count("bytes_written", written)
+        return {"changed": changed, "removed": removed, "ignored": manifest.ignored, "bytes": written}
+
+    def has_state(self):
+        """Return False if the target's local state is gone and the manifest can't be trusted"""
+        return True
+
+    def check(self, entries):
+        """Return (out-of-date paths, stale target paths) found without any network access"""
+        return [], []
+
+    def open(self):
+        """Prepare the target for writing; return True if it changed under us"""
+        return False
+
+    def compare(self, entries):
+        """Return the source paths to write when the target has to be rebuilt"""
+        return sorted(entries)
+
+    def list_paths(self):
+        """Return the paths currently stored at the target"""
+        return []
+
+    def target_paths(self, entries):
+        """Map manifest paths onto the paths stored at the target"""
+        return set(entries)
+
+    def write(self, src_dir, entries, changed, removed, stale):
+        """Store changed paths, delete removed and stale ones; return bytes written"""
+        raise NotImplementedError
+
+    def chunk_paths(self, paths, entries, unit=None):
+        """Split paths into chunks for checkpointing.
+
+        unit maps a path to the unit it must be transferred with (e.g. its
+        slot for packed uploads); paths of one unit stay in the same chunk.
+        """
+        units = {}
+        for path in paths:
+            units.setdefault(unit(path) if unit else path, []).append(path)
+        chunks = []
+        chunk = []
+        size = 0
+        for unit_paths in units.values():
+            unit_size = sum(entries[path]["size"] for path in unit_paths)
+            if chunk and (len(chunk) + len(unit_paths) > self.chunk_files
+                          or size + unit_size > self.chunk_bytes):
+                chunks.append(chunk)
+                chunk = []
+                size = 0
+            chunk.extend(unit_paths)
+            size += unit_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def checkpoint(self, paths, entries):
+        """Record that paths are safely at the target"""
+        self.journal.record({path: entries[path]["sha1"] for path in paths})
+
+    def copy_into(self, src_dir, dst_dir, rel_paths):
+        """Copy rel_paths from src_dir to dst_dir in parallel, returning the CopyResult"""
+        return get_copy_engine().copy_files(
+            (os.path.join(src_dir, *rel_path.split("/")),
+             os.path.join(dst_dir, *rel_path.split("/")))
+            for rel_path in rel_paths)
+
+
+class DirectoryBackend(StorageBackend):
+    """Syncs to a plain folder, e.g. one shared through Dropbox or a network drive.
+
+    The destination is compared by size and mtime on every sync (and by
+    content when use_hash is set), so files changed or deleted there are
+    repaired too. Each chunk of updates is staged and swapped in (see
+    folder_sync.swap_in); deletions follow once every copy is in place.
+    Paths in keep, or whose top-level name is in keep, are never deleted.
+    With folders set, only those top-level folders of the destination
+    belong to this backend; anything else there is left alone.
+    """
+
+    def __init__(self, dest_dir, manifest_file, use_hash=False, keep=(), volatile_keys=None, folders=None):
+        super().__init__(manifest_file, os.path.abspath(dest_dir), volatile_keys)
+        self.dest_dir = dest_dir
+        self.use_hash = use_hash
+        self.keep = keep
+        self.folders = folders
+        self._dest_files = None
+
+    def has_state(self):
+        return os.path.isdir(self.dest_dir)
+
+    def check(self, entries):
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self._dest_files = list_destination(self.dest_dir, self.folders)
+        out_of_date = [rel_path for rel_path, entry in entries.items()
+                       if not self._is_current(entry, self._dest_files.get(rel_path))]
+        stale = [rel_path for rel_path in self._dest_files
+                 if rel_path not in entries and not self._kept(rel_path)]
+        return sorted(out_of_date), sorted(stale)
+
+    def compare(self, entries):
+        return self.check(entries)[0]
+
+    def _is_current(self, entry, existing):
+        """Return True if the destination file (path, stat) holds what entry describes"""
+        if not existing:
+            return False
+        dst_path, dst_stat = existing
+        same_content = lambda: hash_file(dst_path) == entry["sha1"]
+        if is_unchanged(entry["size"], entry["mtime_ns"], dst_stat, same_content):
+            return True
+        # A file kept after a volatile-only rewrite may have been copied as
+        # it is now (by a repair, or a sync of other folders)
+        rewritten = "local" in entry and (lambda: is_volatile_rewrite(
+            entry, *hash_save_file(dst_path, self.volatile_keys)))
+        if rewritten and is_unchanged(*entry["local"], dst_stat, rewritten):
+            return True
+        return self.use_hash and (entry["size"] == dst_stat.st_size and same_content()
+                                  or rewritten and rewritten())
+
+    def list_paths(self):
+        return [rel_path for rel_path in self._dest_files if not self._kept(rel_path)]
+
+    def write(self, src_dir, entries, changed, removed, stale):
+        # Each chunk is swapped in as soon as it is copied; deletions wait
+        # until every copy is in place
+        written = 0
+        for chunk in self.chunk_paths(changed, entries):
+            with span("copy"):
+                written += swap_in(
+                    (os.path.join(src_dir, *rel_path.split("/")),
+                     os.path.join(self.dest_dir, *rel_path.split("/"))) for rel_path in chunk).bytes
+            self.checkpoint(chunk, entries)
+        with span("remove"):
+            remove_files(self.dest_dir,
+                         [os.path.join(self.dest_dir, *rel_path.split("/")) for rel_path in removed + stale
+                          if not self._kept(rel_path)])
+        return written
+
+    def _kept(self, rel_path):
+        return rel_path in self.keep or rel_path.split("/")[0] in self.keep
+
+
+class GitBackend(StorageBackend):
+    """Syncs to any git remote through a long-lived local mirror.
+
+    Only changed files are copied into the mirror's working tree and
+    staged, and one commit is pushed per chunk (normally one per sync). With
+    packed set, each save slot is stored as one archive (see slot_archive)
+    instead of its files.
+
+    Each sync also records the new version of every slot it changed in a
+    SlotHistory index committed to the repo, so one slot can be restored
+    as of any earlier sync without touching the rest of the repo.
+    """
+
+    chunk_bytes = 64 * 1024 * 1024
+
+    def __init__(self, remote_url, mirror_dir, manifest_file, target=None, packed=False, volatile_keys=None):
+        # Switching formats invalidates the manifest, so the repo is
+        # rewritten in the new layout
+        super().__init__(manifest_file, (target or remote_url) + ("#packed" if packed else ""), volatile_keys)
+        self.remote_url = remote_url
+        self.mirror_dir = mirror_dir
+        self.packed = packed
+        self.git_repo = None
+
+    def has_state(self):
+        return os.path.isdir(os.path.join(self.mirror_dir, ".git"))
+
+    def open(self):
+        self.git_repo, moved = self._update_mirror(self.remote_url)
+        return moved
+
+    def list_paths(self):
+        return [p for p in self.git_repo.git.ls_files().splitlines() if not is_history_path(p)]
+
+    def target_paths(self, entries):
+        if not self.packed:
+            return set(entries)
+        paths = set()
+        for rel_path in entries:
+            if rel_path.count("/") >= 2:
+                paths.update(archive_paths(slot_key(rel_path)))
+            else:
+                paths.add(rel_path)
+        return paths
+
+    def write(self, src_dir, entries, changed, removed, stale):
+        # A slot archive has to be built from the whole slot, so packed
+        # slots are never split between chunks
+        chunks = self.chunk_paths(changed, entries, unit=self._unit) or [[]]
+        # Every live slot is looked up, so slots finished by an interrupted
+        # sync are recorded too; unchanged ones are skipped by the index
+        history_slots = sorted({slot_key(p) for p in entries if p.count("/") >= 2})
+        written = 0
+        for index, chunk in enumerate(chunks):
+            last = index == len(chunks) - 1
+            part = f" (part {index + 1} of {len(chunks)})" if len(chunks) > 1 else ""
+            # Deletions go into the last commit, after every file is uploaded,
+            # and so do the history entries, once every slot is complete
+            written += self._push_chunk(src_dir, entries, chunk,
+                                        removed if last else [], stale if last else [], part,
+                                        history_slots if last else [])
+            self.checkpoint(chunk, entries)
+        return written
+
+    def _unit(self, rel_path):
+        if self.packed and rel_path.count("/") >= 2:
+            return slot_key(rel_path)
+        return rel_path
+
+    def _push_chunk(self, src_dir, entries, changed, removed, stale, part, history_slots):
+        git_repo = self.git_repo
+        work_dir = git_repo.working_dir
+        packed = self.packed
+
+        # Files inside save slots go into one archive per slot when packed
+        to_copy = [p for p in changed if not packed or p.count("/") < 2]
+        to_delete = [p for p in removed if not packed or p.count("/") < 2] + stale
+        slots = sorted({slot_key(p) for p in changed + removed if packed and p.count("/") >= 2})
+        live_slots = {slot_key(p) for p in entries if p.count("/") >= 2}
+
+        # Copy changed files to the working directory
+        with span("copy"):
+            result = self.copy_into(src_dir, work_dir, to_copy)
+        result.raise_errors()
+        written = result.bytes
+
+        # Rebuild the archives of changed slots in parallel. An archive holds
+        # every file as it is now, including timestamp-only rewrites
+        with span("pack"):
+            for slot in slots:
+                refresh_kept_entries(src_dir, entries, slot + "/", self.volatile_keys)
+            results, errors = get_copy_engine().run(
+                lambda slot: build_slot_archive(src_dir, slot, entries, work_dir),
+                [slot for slot in slots if slot in live_slots])
+        if errors:
+            slot, error = errors[0]
+            raise Exception(f"Failed to pack {slot}: {error}")
+        for slot, paths in results:
+            to_copy.extend(paths)
+            written += sum(os.path.getsize(os.path.join(work_dir, *path.split("/"))) for path in paths)
+        for slot in slots:
+            if slot not in live_slots:
+                to_delete.extend(archive_paths(slot))
+
+        # Drop files that no longer exist locally
+        for rel_path in to_delete:
+            dst = os.path.join(work_dir, *rel_path.split("/"))
+            if os.path.exists(dst):
+                os.remove(dst)
+
+        # Stage only the paths that changed
+        with span("stage"):
+            self._stage(git_repo, to_copy + to_delete)
+        if history_slots:
+            with span("history"):
+                self._record_history(git_repo, history_slots)
+
+        # Commit only if the staged tree differs from HEAD, then push the new objects
+        with span("commit"):
+            commit_message = f"Update save files - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{part}"
+            if self._commit_index(git_repo, commit_message):
+                count("commits")
+        if self._head_sha(git_repo) is not None:
+            with span("push"):
+                git_repo.remote('origin').push(refspec='HEAD:refs/heads/master').raise_if_error()
+        return written
+
+    def _record_history(self, git_repo, slots):
+        """Add the staged version of each slot to the history index and stage it"""
+        tree = git_repo.git.write_tree()
+        if self.packed:
+            paths = {archive_paths(slot)[0]: slot for slot in slots}
+        else:
+            paths = {slot: slot for slot in slots}
+        history_file = os.path.join(git_repo.working_dir, *HISTORY_PATH.split("/"))
+        history = SlotHistory()
+        if os.path.exists(history_file):
+            with open(history_file, 'r', encoding='utf-8') as f:
+                history = SlotHistory.from_json(f.read())
+
+        when = datetime.now().isoformat(timespec="seconds")
+        added = False
+        for line in git_repo.git.ls_tree("-z", tree, "--", *paths).split("\0"):
+            if not line:
+                continue
+            meta, path = line.split("\t", 1)
+            kind, sha = meta.split()[1:]
+            slot_ref = {"type": "tree" if kind == "tree" else "archive", "sha": sha}
+            added = history.record(paths[path], slot_ref, when) or added
+        if added:
+            os.makedirs(os.path.dirname(history_file), exist_ok=True)
+            with open(history_file, 'w', encoding='utf-8') as f:
+                f.write(history.to_json())
+            self._stage(git_repo, [HISTORY_PATH])
+
+    def _stage(self, git_repo, paths):
+        """Update the index entries of paths from the working directory.
+
+        Paths missing from the working directory are removed from the index.
+        Only the listed entries are hashed and git's own index code does the
+        rest, so staging costs grow with the change set, not the repo.
+        """
+        if not paths:
+            return
+        process = subprocess.run(
+            ["git", "-C", git_repo.working_dir, "update-index", "--add", "--remove", "-z", "--stdin"],
+            input="".join(f"{path}\0" for path in paths).encode("utf-8"), capture_output=True)
+        if process.returncode != 0:
+            raise Exception(f"Failed to stage files: {process.stderr.decode(errors='replace').strip()}")
+
+    def _commit_index(self, git_repo, message):
+        """Commit the index on top of HEAD unless it has HEAD's tree. Returns True if committed."""
+        import git
+        tree = git_repo.git.write_tree()
+        head = self._head_sha(git_repo)
+        if head is not None and git_repo.git.rev_parse("HEAD^{tree}") == tree:
+            return False
+
+        # Same identity GitPython's index.commit would use
+        config = git_repo.config_reader()
+        author, committer = git.Actor.author(config), git.Actor.committer(config)
+        env = {"GIT_AUTHOR_NAME": author.name, "GIT_AUTHOR_EMAIL": author.email,
+               "GIT_COMMITTER_NAME": committer.name, "GIT_COMMITTER_EMAIL": committer.email}
+        parents = ["-p", head] if head else []
+        commit = git_repo.git.commit_tree(tree, *parents, "-m", message, env=env)
+        git_repo.git.update_ref("HEAD", commit)
+        return True
+
+    def _update_mirror(self, remote_url):
+        """Clone or fetch the long-lived mirror and fast-forward it to origin/master.
+
+        Returns the repo and whether its HEAD moved to a tree the sync
+        manifest does not describe (fresh clone or remote changes).
+        """
+        # GitPython is slow to import, so only load it once a sync needs it
+        import git
+
+        mirror_dir = self.mirror_dir
+        if os.path.isdir(os.path.join(mirror_dir, ".git")):
+            git_repo = git.Repo(mirror_dir)
+            origin = git_repo.remote('origin')
+            origin.set_url(remote_url)
+            head_before = self._head_sha(git_repo)
+            origin.fetch()
+        else:
+            if os.path.exists(mirror_dir):
+                shutil.rmtree(mirror_dir)
+            git_repo = git.Repo.clone_from(remote_url, mirror_dir)
+            head_before = None
+
+        if self._has_ref(git_repo, 'origin/master'):
+            if head_before is None:
+                git_repo.git.checkout('-B', 'master', 'origin/master')
+            elif git_repo.is_ancestor('HEAD', 'origin/master'):
+                git_repo.git.merge('--ff-only', 'origin/master')
+            elif not git_repo.is_ancestor('origin/master', 'HEAD'):
+                # Local and remote history diverged; the remote wins and the
+                # next commit is rebuilt from the save directory
+                git_repo.git.reset('--hard', 'origin/master')
+        elif head_before is None:
+            # Empty remote: start the master branch locally
+            git_repo.git.symbolic_ref('HEAD', 'refs/heads/master')
+
+        return git_repo, self._head_sha(git_repo) != head_before
+
+    def _head_sha(self, git_repo):
+        try:
+            return git_repo.head.commit.hexsha
+        except ValueError:
+            return None
+
+    def _has_ref(self, git_repo, ref):
+        import git
+        try:
+            git_repo.git.rev_parse('--verify', '-q', ref)
+            return True
+        except git.GitCommandError:
+            return False
+
+
+class LocalGitBackend(GitBackend):
+    """Syncs to a bare git repository on disk, creating it if needed.
+
+    Handy for a repo on a NAS or USB drive, and for testing sync
+    throughput without a network service.
+    """
+
+    def __init__(self, repo_dir, mirror_dir, manifest_file, packed=False, volatile_keys=None):
+        super().__init__(os.path.abspath(repo_dir), mirror_dir, manifest_file, packed=packed,
+                         volatile_keys=volatile_keys)
+
+    def open(self):
+        if not os.path.exists(self.remote_url):
+            subprocess.run(["git", "init", "-q", "--bare", self.remote_url],
+                           capture_output=True, check=True)
+        return super().open()
+
+
+class GitHubBackend(GitBackend):
+    """Syncs to a GitHub repository, creating it (private) if it does not exist.
+
+    The repository is looked up through the shared API client only once
+    there is something to push. After a sync, full_name holds the name the
+    repository was found or created under.
+    """
+
+    def __init__(self, api, repo_name, token, mirror_dir, manifest_file, packed=False, volatile_keys=None):
+        super().__init__(None, mirror_dir, manifest_file, target=repo_name, packed=packed,
+                         volatile_keys=volatile_keys)
+        self.api = api
+        self.repo_name = repo_name
+        self.token = token
+        self.full_name = repo_name
+
+    def open(self):
+        repo = self._get_or_create_repo()
+        self.full_name = repo["full_name"]
+        self.remote_url = repo["clone_url"].replace('https://', f'https://{self.token}@')
+        return super().open()
+
+    def _get_or_create_repo(self):
+        try:
+            repo_name = self.repo_name.split('/')[-1]
+
+            # Try the configured repository, then one of that name owned by the
+            # token's user; lookups are cached by the shared client
+            candidates = [self.repo_name]
+            own_name = f"{self.api.get_user()['login']}/{repo_name}"
+            if own_name != candidates[0]:
+                candidates.append(own_name)
+            for full_name in candidates:
+                try:
+                    repo = self.api.get_repo(full_name)
+                    print(f"Using existing repository: {repo['full_name']}")
+                    return repo
+                except GitHubAPIError as e:
+                    if e.status != 404:
+                        raise
+
+            # Neither exists, so one create call is enough
+            repo = self.api.create_repo(
+                repo_name,
+                description="Schedule I Save Files",
+                private=True  # Make the repository private by default
+            )
+            print(f"Created new repository: {repo['full_name']}")
+            return repo
+        except Exception as e:
+            raise Exception(f"Failed to get or create repository: {str(e)}")
@@ -0,0 +1,58 @@
+import os
+import json
+
+JOURNAL_VERSION = 1
+
+
+class TransferJournal:
+    """Append-only record of the files a sync has finished transferring.
+
+    A sync writes one line per checkpointed chunk, mapping each source path
+    to the SHA-1 that reached the target, and deletes the journal once it
+    completes. If the sync is interrupted, the next one to the same target
+    skips every path whose current content matches the journal.
+    """
+
+    def __init__(self, journal_file, target=""):
+        self.journal_file = journal_file
+        self.target = target
+
+    def load(self):
+        """Return {path: sha1} of the transfers recorded for this target"""
+        if not os.path.exists(self.journal_file):
+            return {}
+        done = {}
+        try:
+            with open(self.journal_file, 'r') as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("version") != JOURNAL_VERSION or header.get("target") != self.target:
+                    return {}
+                for line in f:
+                    try:
+                        done.update(json.loads(line))
+                    except ValueError:
+                        # The last line may be cut short by the interruption
+                        break
+        except Exception as e:
+            print(f"Warning: Could not read transfer journal {self.journal_file}: {e}")
+            return {}
+        return done
+
+    def record(self, transferred):
+        """Append {path: sha1} for a chunk that is safely at the target"""
+        if not transferred:
+            return
+        os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+        new_file = not os.path.exists(self.journal_file)
+        with open(self.journal_file, 'a') as f:
+            if new_file:
+                f.write(json.dumps({"version": JOURNAL_VERSION, "target": self.target}) + "\n")
+            f.write(json.dumps(transferred) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,7 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app's modules live in src/ and the GitHub stand-in in benchmarks/
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
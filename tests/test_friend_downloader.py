@@ -0,0 +1,128 @@
+import os
+import pytest
+from local_github import LocalGitHub
+from utils.github_api import GitHubAPI
+from utils.storage_backend import LocalGitBackend
+from utils.friend_downloader import FriendDownloader
+
+REPO = "friend/saves"
+SLOT_FILES = {
+    "Game.json": '{"GameVersion": "0.3"}',
+    "Metadata.json": '{"LastPlayedDate": "2024-05-01"}',
+    "Players/Player_0/Inventory.json": '{"Items": []}',
+}
+
+
+def write_slot(save_dir, slot, files):
+    for rel_path, text in files.items():
+        path = os.path.join(save_dir, *slot.split("/"), *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+def read_tree(root):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return files
+
+
+@pytest.fixture(params=[False, True], ids=["raw", "packed"])
+def friend_repo(request, tmp_path):
+    """A friend's repo, pushed by the sync engine and served by the stand-in"""
+    save_dir = str(tmp_path / "friend_saves")
+    write_slot(save_dir, "7656/SaveGame_1", SLOT_FILES)
+    write_slot(save_dir, "7656/SaveGame_2", {"Game.json": '{"GameVersion": "0.2"}'})
+    bare_repo = str(tmp_path / "remote.git")
+    LocalGitBackend(bare_repo, str(tmp_path / "mirror"), str(tmp_path / "manifest.json"),
+                    packed=request.param).sync(save_dir)
+
+    github = LocalGitHub()
+    github.add_repo(REPO, bare_repo)
+    github.start()
+    yield github, save_dir, bare_repo, request.param
+    github.stop()
+
+
+@pytest.fixture
+def downloader(friend_repo, tmp_path):
+    github = friend_repo[0]
+    return FriendDownloader(GitHubAPI(api_url=github.url), str(tmp_path / "blob_cache"))
+
+
+def test_list_slots(friend_repo, downloader):
+    packed = friend_repo[3]
+    slots = downloader.list_slots(REPO)
+    assert sorted(slots) == ["7656/SaveGame_1", "7656/SaveGame_2"]
+    assert {ref["type"] for ref in slots.values()} == {"archive" if packed else "tree"}
+
+
+def test_download_writes_slot(downloader, tmp_path):
+    slots = downloader.list_slots(REPO)
+    dest = tmp_path / "dest"
+    stats = downloader.download_slot(REPO, slots["7656/SaveGame_1"], str(dest))
+    assert read_tree(dest) == SLOT_FILES
+    assert stats["files"] == len(SLOT_FILES)
+    assert stats["fetched"] > 0 and stats["cached"] == 0
+
+
+def test_second_download_is_served_from_cache(friend_repo, downloader, tmp_path):
+    github = friend_repo[0]
+    slot_ref = downloader.list_slots(REPO)["7656/SaveGame_1"]
+    downloader.download_slot(REPO, slot_ref, str(tmp_path / "first"))
+
+    requests_before = github.request_count
+    stats = downloader.download_slot(REPO, slot_ref, str(tmp_path / "second"))
+    assert read_tree(tmp_path / "second") == SLOT_FILES
+    assert stats["fetched"] == 0 and stats["cached"] > 0 and stats["bytes"] == 0
+    # A tree slot is listed again, but no blob or archive is fetched
+    assert github.request_count - requests_before == (0 if slot_ref["type"] == "archive" else 1)
+
+
+def test_changed_slot_only_fetches_changed_blobs(friend_repo, downloader, tmp_path):
+    github, save_dir, bare_repo, packed = friend_repo
+    downloader.download_slot(REPO, downloader.list_slots(REPO)["7656/SaveGame_1"], str(tmp_path / "first"))
+
+    changed = dict(SLOT_FILES, **{"Game.json": '{"GameVersion": "0.4"}'})
+    write_slot(save_dir, "7656/SaveGame_1", changed)
+    LocalGitBackend(bare_repo, str(tmp_path / "mirror"), str(tmp_path / "manifest.json"),
+                    packed=packed).sync(save_dir)
+
+    stats = downloader.download_slot(REPO, downloader.list_slots(REPO)["7656/SaveGame_1"],
+                                     str(tmp_path / "second"))
+    assert read_tree(tmp_path / "second") == changed
+    if packed:
+        # The slot's archive is one blob, so it is fetched again as a whole
+        assert stats["fetched"] == 1
+    else:
+        assert (stats["fetched"], stats["cached"]) == (1, len(SLOT_FILES) - 1)
+
+
+class TamperingAPI:
+    """Passes requests to the stand-in but flips a byte in every blob"""
+
+    def __init__(self, api):
+        self.api = api
+
+    def get_json(self, *args, **kwargs):
+        return self.api.get_json(*args, **kwargs)
+
+    def get_raw(self, path):
+        data = self.api.get_raw(path)
+        return bytes([data[0] ^ 1]) + data[1:] if "/git/blobs/" in path else data
+
+
+def test_blob_with_wrong_sha_is_rejected(friend_repo, tmp_path):
+    github = friend_repo[0]
+    cache_dir = tmp_path / "blob_cache"
+    downloader = FriendDownloader(TamperingAPI(GitHubAPI(api_url=github.url)), str(cache_dir))
+    slot_ref = downloader.list_slots(REPO)["7656/SaveGame_1"]
+
+    with pytest.raises(Exception, match="does not match its SHA"):
+        downloader.download_slot(REPO, slot_ref, str(tmp_path / "dest"))
+    # Nothing unverified is left in the cache for later downloads
+    assert not [name for _, _, names in os.walk(cache_dir) for name in names]
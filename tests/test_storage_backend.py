@@ -0,0 +1,53 @@
+import os
+import json
+import pytest
+from utils.save_compare import DEFAULT_VOLATILE_KEYS
+from utils.slot_archive import extract_slot_archive
+from utils.storage_backend import LocalGitBackend, DirectoryBackend
+from test_friend_downloader import write_slot, read_tree
+
+SLOT = "7656/SaveGame_1"
+
+
+@pytest.mark.parametrize("playtime", [1000000, 1], ids=["grown", "shrunk"])
+def test_packed_slot_with_volatile_rewrite_and_real_change(tmp_path, playtime):
+    save_dir = str(tmp_path / "saves")
+    write_slot(save_dir, SLOT, {"Time.json": json.dumps({"Playtime": 999, "X": 1}),
+                                "Game.json": '{"GameVersion": "0.3"}'})
+    backend = LocalGitBackend(str(tmp_path / "remote.git"), str(tmp_path / "mirror"),
+                              str(tmp_path / "manifest.json"), packed=True,
+                              volatile_keys=DEFAULT_VOLATILE_KEYS)
+    backend.sync(save_dir)
+
+    # A timestamp-only rewrite is skipped on its own...
+    write_slot(save_dir, SLOT, {"Time.json": json.dumps({"Playtime": playtime, "X": 1})})
+    assert backend.sync(save_dir)["ignored"] == [f"{SLOT}/Time.json"]
+    # ...but a real change repacks the slot with the file as it is now
+    write_slot(save_dir, SLOT, {"Game.json": '{"GameVersion": "0.4"}'})
+    assert backend.sync(save_dir)["changed"] == [f"{SLOT}/Game.json"]
+
+    extracted = tmp_path / "extracted"
+    with open(os.path.join(str(tmp_path / "mirror"), "7656", "SaveGame_1.tar.xz"), "rb") as f:
+        extract_slot_archive(f, str(extracted))
+    assert read_tree(extracted) == read_tree(os.path.join(save_dir, *SLOT.split("/")))
+    assert backend.sync(save_dir)["changed"] == []
+
+
+def test_folder_copy_of_timestamp_only_rewrite_is_not_recopied(tmp_path):
+    save_dir = str(tmp_path / "saves")
+    dest_dir = str(tmp_path / "shared")
+    write_slot(save_dir, "A/SaveGame_1", {"Metadata.json": '{"LastPlayedDate": "2024-05-01"}'})
+    write_slot(save_dir, "B/SaveGame_1", {"Game.json": '{"GameVersion": "0.3"}'})
+
+    def backend(name, folders):
+        return DirectoryBackend(dest_dir, str(tmp_path / name), volatile_keys=DEFAULT_VOLATILE_KEYS,
+                                folders=folders)
+
+    backend("a.json", ["A"]).sync(save_dir, ["A"])
+    write_slot(save_dir, "A/SaveGame_1", {"Metadata.json": '{"LastPlayedDate": "2024-05-02"}'})
+    # A sync with its own manifest copies the rewritten file as it is now
+    assert backend("all.json", None).sync(save_dir)["changed"] == ["A/SaveGame_1/Metadata.json",
+                                                                   "B/SaveGame_1/Game.json"]
+    for _ in range(2):
+        result = backend("a.json", ["A"]).sync(save_dir, ["A"])
+        assert result["changed"] == [] and result["bytes"] == 0